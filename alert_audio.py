@@ -0,0 +1,175 @@
+# Spoken alerts from pre-rendered audio. The phrases are a small fixed set (each camera's alert_phrase for
+# every class in detector.ALERT_CLASSES), so they are synthesized once with pyttsx3 into WAV files in
+# ALERT_AUDIO_DIR, loaded into memory at startup and written straight to an open low-latency output
+# stream. pyttsx3 only speaks messages that are not in the cache. The detector renders missing phrases
+# while it starts up; render them at install time to keep that off the first boot:
+#
+#   python alert_audio.py
+#   python alert_audio.py rear back
+import argparse
+import hashlib
+import os
+import time
+import wave
+
+import numpy as np
+
+ALERT_AUDIO_DIR = "alert_audio"
+# Output latency asked of the sound card: "low" is the lowest the device reports as safe
+ALERT_AUDIO_LATENCY = "low"
+
+
+def alert_phrases(cameras, classes):
+    """Every message the cameras can speak: their alert_phrase for each alert class."""
+    return sorted({camera["alert_phrase"].format(label=label) for camera in cameras for label in classes})
+
+
+def clip_path(phrase, voice, rate, folder=ALERT_AUDIO_DIR):
+    """Cache file of a phrase; the voice settings are part of the key so changing them renders it again."""
+    key = hashlib.sha1(f"{voice}|{rate}|{phrase}".encode()).hexdigest()[:16]
+    return os.path.join(folder, f"{key}.wav")
+
+
+def load_clip(path):
+    """(sample rate, int16 samples of shape (frames, channels)) from a 16-bit WAV file."""
+    with wave.open(path, "rb") as f:
+        if f.getsampwidth() != 2:
+            raise ValueError(f"{f.getsampwidth() * 8}-bit samples, expected 16")
+        pcm = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").reshape(-1, f.getnchannels())
+        return f.getframerate(), pcm
+
+
+class AlertAudio:
+    """Speaks alert messages, from the in-memory clips when there is one and a sound output to play it on,
+    otherwise with pyttsx3.
+
+    The output streams stay open between alerts so playback does not wait for the device to open (with
+    PulseAudio, as in modular.service, pyttsx3 can still play alongside them).
+    """
+
+    def __init__(self, voice_engine, folder=ALERT_AUDIO_DIR):
+        self.voice_engine = voice_engine
+        self.folder = folder
+        self.clips = {}  # phrase -> (sample rate, pcm)
+        self.streams = {}  # (sample rate, channels) -> started sounddevice.OutputStream
+        self.played = 0  # Messages played from the cache
+        self.synthesized = 0  # Messages spoken by pyttsx3
+
+    def paths(self, phrases):
+        voice, rate = self.voice_engine.getProperty("voice"), self.voice_engine.getProperty("rate")
+        return {phrase: clip_path(phrase, voice, rate, self.folder) for phrase in phrases}
+
+    def render(self, phrases):
+        """Synthesize the phrases that are not in the cache folder yet; returns how many were rendered."""
+        missing = {phrase: path for phrase, path in self.paths(phrases).items() if not os.path.exists(path)}
+        if not missing:
+            return 0
+        os.makedirs(self.folder, exist_ok=True)
+        start = time.perf_counter()
+        # Under a temporary name, so a render cut short is not loaded as a clip next time
+        temporary = {path: os.path.splitext(path)[0] + ".tmp.wav" for path in missing.values()}
+        for phrase, path in missing.items():
+            self.voice_engine.save_to_file(phrase, temporary[path])
+        self.voice_engine.runAndWait()  # Writes all queued files
+        for path, rendered in temporary.items():
+            if os.path.exists(rendered):
+                os.replace(rendered, path)
+        print(f"Alert audio: rendered {len(missing)} phrases in {time.perf_counter() - start:.1f} s")
+        return len(missing)
+
+    def prepare(self, phrases):
+        """Render the missing phrases, load all of them and open the output. Returns self."""
+        if self.voice_engine is None:
+            return self  # No voice settings to look the clips up by, and nothing would speak anyway
+        try:
+            self.render(phrases)
+        except Exception as e:
+            print(f"Alert audio warning: could not render phrases ({e})")
+        for phrase, path in self.paths(phrases).items():
+            try:
+                self.clips[phrase] = load_clip(path)
+            except (OSError, EOFError, wave.Error, ValueError) as e:
+                print(f"Alert audio warning: {phrase!r} not cached ({e}), pyttsx3 will speak it")
+        if self.clips:
+            self.open_output()
+        return self
+
+    def open_output(self):
+        try:
+            import sounddevice  # Only needed to play the clips; loads PortAudio, so imported in the startup phase
+            for rate, pcm in self.clips.values():
+                if (rate, pcm.shape[1]) not in self.streams:
+                    stream = sounddevice.OutputStream(samplerate=rate, channels=pcm.shape[1], dtype="int16",
+                                                      latency=ALERT_AUDIO_LATENCY)
+                    stream.start()
+                    self.streams[(rate, pcm.shape[1])] = stream
+        except Exception as e:
+            print(f"Alert audio warning: no sound output for the cached phrases ({e}), pyttsx3 will speak them")
+            self.close_output()
+
+    def speak(self, message):
+        """Say message, blocking until it is played; returns the time.monotonic() at which its first sample
+        reaches the output, or None if nothing could speak it.
+
+        For a clip that is the time it is written plus the stream's output latency. For pyttsx3 it is when
+        the driver starts the utterance, which is before its first sample: synthesis and device start come
+        on top.
+        """
+        clip = self.clips.get(message)
+        if clip is not None and self.streams:
+            rate, pcm = clip
+            stream = self.streams[(rate, pcm.shape[1])]
+            try:
+                first_sample = time.monotonic() + stream.latency
+                stream.write(pcm)
+                self.played += 1
+                return first_sample
+            except Exception as e:
+                print(f"Alert audio warning: playback failed ({e}), falling back to pyttsx3")
+                self.close_output()
+        if self.voice_engine is None:
+            return None
+        started = []
+        token = self.voice_engine.connect("started-utterance", lambda name: started.append(time.monotonic()))
+        self.voice_engine.say(message)
+        self.voice_engine.runAndWait()
+        self.voice_engine.disconnect(token)
+        self.synthesized += 1
+        return started[0] if started else None
+
+    def close_output(self):
+        for stream in self.streams.values():
+            try:
+                stream.close()
+            except Exception:
+                pass
+        self.streams.clear()
+
+    def close(self):
+        self.close_output()
+        if self.voice_engine:
+            self.voice_engine.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the spoken alerts into the alert audio cache")
+    parser.add_argument("cameras", nargs="*", help="cameras whose phrases to render (default: all)")
+    args = parser.parse_args()
+
+    import detector  # Camera phrases, alert classes and the voice settings the detector speaks with
+    unknown = [name for name in args.cameras if name not in detector.CAMERAS]
+    if unknown:
+        raise SystemExit(f"Unknown camera(s): {', '.join(unknown)}. Known: {', '.join(detector.CAMERAS)}")
+    cameras = [detector.CAMERAS[name] for name in args.cameras or detector.CAMERAS]
+    audio = AlertAudio(detector.init_voice_engine())
+    if audio.voice_engine is None:
+        raise SystemExit(1)
+    phrases = alert_phrases(cameras, detector.ALERT_CLASSES)
+    audio.render(phrases)
+    for phrase, path in audio.paths(phrases).items():
+        rate, pcm = load_clip(path)
+        print(f"{path}  {len(pcm) / rate:.2f} s  {phrase}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+
+# Time constant of the distance smoothing (seconds): a step change is ~63% through after this long
+ALERT_SMOOTHING = 0.3
+# A track enters the alert window inside ALERT_RANGE and only leaves it this many metres past the far edge
+ALERT_HYSTERESIS = 0.5
+# The same track cannot alert again within this many seconds, even if it leaves and re-enters the window
+ALERT_COOLDOWN = 10.0
+# Alert state of a track not seen for this long is dropped (seconds)
+ALERT_FORGET = 5.0
+
+
+class TrackAlert:
+    __slots__ = ("meters", "in_range", "last_alert", "seen_at")
+
+    def __init__(self, meters, t):
+        self.meters = meters
+        self.in_range = False
+        self.last_alert = float("-inf")
+        self.seen_at = t
+
+
+class AlertManager:
+    """Per-track alert state, replacing the single alert_sent flag.
+
+    Each track's distance is smoothed with a time-based EMA. A track alerts when its smoothed distance
+    enters alert_range, stays in range until it is ALERT_HYSTERESIS past the far edge, and is then held
+    off by a per-track cooldown. A box flickering for a frame or two keeps its track (see tracker.MAX_AGE)
+    and therefore does not alert again.
+    """
+
+    def __init__(self, alert_range=(0.1, 5.0), smoothing=ALERT_SMOOTHING, hysteresis=ALERT_HYSTERESIS,
+                 cooldown=ALERT_COOLDOWN, forget=ALERT_FORGET):
+        self.alert_range = alert_range
+        self.smoothing = smoothing
+        self.hysteresis = hysteresis
+        self.cooldown = cooldown
+        self.forget = forget
+        self.states = {}
+        self.alerts = 0
+        self.suppressed = 0
+
+    def update(self, track_ids, meters, alertable, t):
+        """Feed one frame's rows; returns (in_range mask, smoothed metres, row indices that should alert now).
+
+        alertable marks rows whose class may alert at all (ALERT_MASK[class_ids]).
+        """
+        count = len(track_ids)
+        in_range = np.zeros(count, dtype=bool)
+        smoothed = np.array(meters, dtype=np.float64)
+        alerts = []
+        near, far = self.alert_range
+        for i in range(count):
+            if not alertable[i]:
+                continue
+            track_id = int(track_ids[i])
+            state = self.states.get(track_id)
+            value = float(meters[i])
+            if state is None:
+                if not math.isfinite(value):
+                    continue
+                state = self.states[track_id] = TrackAlert(value, t)
+            elif math.isfinite(value):
+                alpha = 1.0 - math.exp(-max(t - state.seen_at, 0.0) / self.smoothing) if self.smoothing else 1.0
+                state.meters += alpha * (value - state.meters)
+            state.seen_at = t
+            smoothed[i] = state.meters
+
+            if state.in_range:
+                state.in_range = near < state.meters < far + self.hysteresis
+            elif near < state.meters < far:
+                state.in_range = True
+                if t - state.last_alert >= self.cooldown:
+                    state.last_alert = t
+                    alerts.append(i)
+                else:
+                    self.suppressed += 1
+            in_range[i] = state.in_range
+
+        self.alerts += len(alerts)
+        for track_id in [k for k, state in self.states.items() if t - state.seen_at > self.forget]:
+            del self.states[track_id]
+        return in_range, smoothed, alerts
@@ -0,0 +1,122 @@
+import threading
+import time
+
+import numpy as np
+
+# How long the batch waits for the remaining cameras once the first frame arrived (seconds)
+BATCH_TIMEOUT = 0.03
+
+
+class _Request:
+    __slots__ = ("image", "detections", "error", "done")
+
+    def __init__(self, image):
+        self.image = image
+        self.detections = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchInference:
+    """Runs one forward pass for the latest frame of every camera.
+
+    Each camera's inference stage calls infer() with its resized frame and blocks until the batch
+    it joined has been run, or skip() on frames it does not run the network for. The batch is closed as soon as every camera has submitted a frame, or
+    BATCH_TIMEOUT after the first one arrived, so one slow camera cannot hold up the others.
+    """
+
+    def __init__(self, model, expected=1, timeout=BATCH_TIMEOUT):
+        self.model = model  # models.Detector
+        self.expected = expected
+        self.timeout = timeout
+        self.pending = {}
+        self.cond = threading.Condition()
+        self.running = True
+        self.batches = 0
+        self.frames = 0
+        self.forward_time = 0.0
+        self.thread = threading.Thread(target=self.run, name="batch-inference", daemon=True)
+        self.thread.start()
+
+    def infer(self, key, image):
+        """Queue image for the next batch and return its detections, shaped (1, 1, N, 7) like the Caffe net's output.
+
+        An error running the batch is raised here, in every camera that was part of it, so their
+        inference stages fail (and the pipeline stops) instead of carrying on without detections.
+        """
+        request = _Request(image)
+        with self.cond:
+            if not self.running:
+                return np.zeros((1, 1, 0, 7), dtype=np.float32)
+            self.pending[key] = request
+            self.cond.notify_all()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.detections
+
+    def skip(self, key):
+        """Tell the batcher this camera has no frame for the current batch, so it need not wait for it."""
+        with self.cond:
+            if self.running and key not in self.pending:
+                self.pending[key] = None
+                self.cond.notify_all()
+
+    def run(self):
+        while self.running:
+            with self.cond:
+                while self.running and not self.pending:
+                    self.cond.wait()
+                deadline = time.monotonic() + self.timeout
+                while self.running and len(self.pending) < self.expected:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                batch, self.pending = self.pending, {}
+            batch = {key: request for key, request in batch.items() if request is not None}
+            if batch:
+                self.run_batch(batch)
+
+    def run_batch(self, batch):
+        keys = list(batch)
+        try:
+            inputs = self.model.preprocess([batch[key].image for key in keys])
+            start = time.perf_counter()
+            rows = self.model.infer(inputs)
+            self.forward_time += time.perf_counter() - start
+            # Column 0 of the SSD output is the index of the image inside the batch
+            image_ids = rows[:, 0].astype(int)
+            for i, key in enumerate(keys):
+                batch[key].detections = rows[image_ids == i][np.newaxis, np.newaxis]
+        except Exception as e:
+            print(f"Batch inference error: {e}")
+            for key in keys:
+                batch[key].error = e
+        self.batches += 1
+        self.frames += len(keys)
+        for key in keys:
+            batch[key].done.set()
+
+    def frame_cost(self):
+        """Average forward-pass time per frame so far (seconds)."""
+        return self.forward_time / self.frames if self.frames else 0.0
+
+    def report(self):
+        if not self.batches:
+            return
+        print(f"[batch] avg batch size {self.frames / self.batches:.2f} | "
+              f"{self.forward_time / self.batches * 1000:.1f} ms per forward pass | "
+              f"{self.forward_time / self.frames * 1000:.1f} ms per frame")
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+            # Release any camera still waiting on a batch (skip() leaves None for cameras without a frame)
+            for request in self.pending.values():
+                if request is None:
+                    continue
+                request.detections = np.zeros((1, 1, 0, 7), dtype=np.float32)
+                request.done.set()
+            self.pending = {}
@@ -0,0 +1,90 @@
+# Micro-benchmark: per-row detection loop (old main.py) vs postprocess.postprocess()
+# Usage: python bench_postprocess.py [boxes_per_frame] [iterations]
+import sys
+import time
+
+import numpy as np
+
+from calibration import distance_lut
+from postprocess import class_mask, postprocess
+
+KNOWN_WIDTH = 11.0
+FOCAL_LENGTH = 543.0
+CLASSES = ["background", "aeroplane", "bicycle", "bird", "boat", "bottle", "bus", "car", "cat", "chair", "person",
+           "diningtable", "dog", "horse", "motorbike", "person", "pottedplant", "sheep", "sofa", "train", "tvmonitor", "truck"]
+IGNORE = set(
+    ["background", "aeroplane", "bicycle", "bird", "boat", "bottle", "cat", "chair", "diningtable",
+     "dog", "horse", "pottedplant", "sheep", "sofa", "train", "tvmonitor"])
+
+
+def distance_to_camera(knownWidth, focalLength, perWidth):
+    return (knownWidth * focalLength) / perWidth
+
+
+def legacy_postprocess(detections, w, h):
+    """The loop from the original main.py, without the logging and drawing side effects."""
+    results = []
+    for i in np.arange(0, detections.shape[2]):
+        confidence = detections[0, 0, i, 2]
+        if confidence > 0.8:
+            idx = int(detections[0, 0, i, 1])
+            if CLASSES[idx] in IGNORE:
+                continue
+            box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
+            (startX, startY, endX, endY) = box.astype("int")
+            inches = distance_to_camera(KNOWN_WIDTH, FOCAL_LENGTH, endX - startX)
+            alert = inches * 0.0254 > 0.1 and inches * 0.0254 < 5.0 and (CLASSES[idx] == "person" or CLASSES[idx] == "car" or CLASSES[idx] == "truck")
+            results.append((idx, confidence, (startX, startY, endX, endY), inches * 0.0254, alert))
+    return results
+
+
+def synthetic_detections(boxes, rng):
+    rows = np.zeros((boxes, 7), dtype=np.float32)
+    rows[:, 1] = rng.integers(1, 21, boxes)
+    rows[:, 2] = rng.uniform(0.0, 1.0, boxes)
+    x1 = rng.uniform(0.0, 0.8, boxes)
+    y1 = rng.uniform(0.0, 0.8, boxes)
+    rows[:, 3] = x1
+    rows[:, 4] = y1
+    rows[:, 5] = x1 + rng.uniform(0.01, 0.2, boxes)
+    rows[:, 6] = y1 + rng.uniform(0.01, 0.2, boxes)
+    return rows[np.newaxis, np.newaxis]
+
+
+def main():
+    boxes = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    w, h = 500, 280
+    rng = np.random.default_rng(0)
+    frames = [synthetic_detections(boxes, rng) for _ in range(64)]
+
+    scale = np.array([w, h, w, h], dtype=np.float32)
+    keep = ~class_mask(CLASSES, IGNORE)
+    alert = class_mask(CLASSES, ("person", "car", "truck"))
+    # One width for every class, as the legacy loop assumed
+    lut = distance_lut({"focal_length": FOCAL_LENGTH, "known_width": KNOWN_WIDTH}, ["person"] * len(CLASSES), w)
+
+    # Both paths must agree before we time them
+    for detections in frames:
+        old = legacy_postprocess(detections, w, h)
+        new = postprocess(detections, scale, keep, alert, lut)
+        assert [row[0] for row in old] == new.class_ids.tolist()
+        assert [row[4] for row in old] == new.in_range.tolist()
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        legacy_postprocess(frames[i % len(frames)], w, h)
+    legacy = (time.perf_counter() - start) / iterations
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        postprocess(frames[i % len(frames)], scale, keep, alert, lut)
+    vectorized = (time.perf_counter() - start) / iterations
+
+    print(f"{boxes} candidate boxes per frame, {iterations} frames")
+    print(f"loop:       {legacy * 1e6:8.1f} us/frame")
+    print(f"vectorized: {vectorized * 1e6:8.1f} us/frame ({legacy / vectorized:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Detector-loop stall per alert: old save_screenshot() vs SnapshotWriter.submit()
+# Usage: python bench_snapshot.py [alerts]
+import base64
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from logwriter import LogWriter
+from snapshot import SnapshotWriter
+
+FRAME_WIDTH = 500
+FRAME_HEIGHT = 280
+
+
+def legacy_save_screenshot(folder, frame):
+    """save_screenshot() from the original main.py: two JPEG encodes and base64, all inline."""
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    screenshot_filename = os.path.join(folder, f"person_{timestamp}.jpg")
+    cv2.imwrite(screenshot_filename, frame)
+    _, buffer = cv2.imencode('.jpg', frame)
+    image_base64 = base64.b64encode(buffer).decode('utf-8')
+    return timestamp, image_base64
+
+
+def main():
+    alerts = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8) for _ in range(8)]
+    row = ["DEMO_1", "CxD_DEMO_1", "REAR_DEMO_1", "person", "95.00", "1.50", "No", "No", "REAR", "GOOD"]
+
+    with tempfile.TemporaryDirectory() as folder:
+        stalls = []
+        for i in range(alerts):
+            start = time.perf_counter()
+            legacy_save_screenshot(folder, frames[i % len(frames)])
+            stalls.append(time.perf_counter() - start)
+        legacy = np.array(stalls)
+
+        log_writer = LogWriter({"images": (os.path.join(folder, "image_log.csv"), ["image"])})
+        snapshots = SnapshotWriter(folder, log_writer)
+        stalls = []
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence "Screenshot saved" lines
+            for i in range(alerts):
+                start = time.perf_counter()
+                snapshots.submit(frames[i % len(frames)], "person", row)
+                stalls.append(time.perf_counter() - start)
+                time.sleep(0.005)  # Alerts are spread out in practice, let the workers keep up
+            snapshots.close()
+        log_writer.close()
+        offloaded = np.array(stalls)
+
+    print(f"{alerts} alerts at {FRAME_WIDTH}x{FRAME_HEIGHT}")
+    for name, stalls in (("inline", legacy), ("worker pool", offloaded)):
+        print(f"{name:12s} stall p50 {np.percentile(stalls, 50) * 1000:6.2f} ms | "
+              f"p99 {np.percentile(stalls, 99) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# Soak benchmark: the detector's per-frame work in a loop for a long time, with the reused buffers
+# (frame pool, ROI input, in-place network input) or with a fresh allocation for every frame like main.py.
+# Prints per-window p50/p99 latency and resident memory, plus bytes allocated per frame, as JSON.
+#
+#   python bench_soak.py --duration 600
+#   python bench_soak.py recording.mp4 --duration 1800 --window 60 --output soak.json
+import argparse
+import json
+import os
+import resource
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+import detector
+import models
+from pipeline import FramePool
+from postprocess import class_mask, postprocess
+from roi import RegionOfInterest
+from sources import open_source
+from streaming import RawStream
+
+
+def rss_mb():
+    """Current resident set size in MB (peak on systems without /proc)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_source(source):
+    if source == "synthetic":
+        spec = {"type": "synthetic"}
+    elif os.path.isdir(source):
+        spec = {"type": "images", "path": source, "loop": True}
+    else:
+        spec = {"type": "video", "path": source, "realtime": False, "loop": True}
+    frames = open_source({"source": spec}, detector.FRAME_WIDTH, detector.FRAME_HEIGHT)
+    if not frames.open():
+        raise SystemExit(f"Could not open {frames}")
+    return frames
+
+
+class Loop:
+    """capture -> network input -> preprocess -> inference -> postprocess -> overlay -> encode -> write, one frame per step."""
+
+    def __init__(self, model, source, pooled):
+        self.model = model
+        self.source = make_source(source)
+        self.pooled = pooled
+        self.size = (detector.FRAME_WIDTH, detector.FRAME_HEIGHT)
+        self.keep = class_mask(detector.CLASSES, detector.DETECT_CLASSES)
+        self.lut = detector.distance_lut("default")
+        self.roi = RegionOfInterest(None, *self.size)
+        self.frames = FramePool()
+        self.stream = RawStream("soak", self.size[0], self.size[1], [])
+        self.sink = open(os.devnull, 'wb')
+
+    def step(self):
+        if self.pooled:
+            frame = self.source.read(self.frames.acquire())
+            inputs = self.model.preprocess([self.roi.network_input(frame)])
+        else:
+            frame = self.source.read()
+            # A new resized image and network input every frame
+            inputs = self.model.preprocess([cv2.resize(frame, self.model.size)]).copy()
+        if frame.shape[1::-1] != self.size:
+            frame = cv2.resize(frame, self.size)
+        detections = self.model.infer(inputs)[np.newaxis, np.newaxis]
+        found = postprocess(detections, self.roi.scale, self.keep, detector.ALERT_MASK, self.lut,
+                            alert_range=detector.ALERT_RANGE)
+        detector.draw_overlay(frame, found, found.in_range.any())
+        self.sink.write(memoryview(self.stream.encode(frame)).cast('B'))
+        if self.pooled:
+            self.frames.release(frame)
+
+    def close(self):
+        self.source.release()
+        self.sink.close()
+
+
+def allocated_per_frame(loop, frames=200):
+    """Average of the extra memory a frame allocates at its peak, in bytes (tracemalloc sees numpy and
+    OpenCV output arrays). With every buffer reused this is close to zero."""
+    tracemalloc.start()
+    total = 0
+    for _ in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        loop.step()
+        total += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return total / frames
+
+
+def soak(model, source, pooled, duration, window, warmup=50):
+    loop = Loop(model, source, pooled)
+    for _ in range(warmup):
+        loop.step()
+    per_frame_bytes = allocated_per_frame(loop)
+
+    windows = []
+    samples = []
+    started = window_start = time.perf_counter()
+    while time.perf_counter() - started < duration:
+        t0 = time.perf_counter()
+        loop.step()
+        t1 = time.perf_counter()
+        samples.append(t1 - t0)
+        if t1 - window_start >= window:
+            ms = np.array(samples) * 1000
+            windows.append({
+                "t_s": round(t1 - started, 1),
+                "frames": len(samples),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p99_ms": round(float(np.percentile(ms, 99)), 3),
+                "rss_mb": round(rss_mb(), 1),
+            })
+            print(f"[{'pooled' if pooled else 'alloc'}] {windows[-1]}")
+            samples = []
+            window_start = t1
+    loop.close()
+
+    rss = [w["rss_mb"] for w in windows] or [rss_mb()]
+    return {
+        "peak_allocated_kb_per_frame": round(per_frame_bytes / 1024, 1),
+        "p99_ms_worst_window": max((w["p99_ms"] for w in windows), default=None),
+        "rss_growth_mb": round(rss[-1] - rss[0], 1),
+        "pool_misses": loop.frames.misses,
+        "windows": windows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-running soak benchmark of the detector's per-frame work")
+    parser.add_argument("source", nargs="?", default="synthetic",
+                        help="video file, directory of images or \"synthetic\" (replayed in a loop)")
+    parser.add_argument("--duration", type=float, default=300, help="seconds per mode")
+    parser.add_argument("--window", type=float, default=30, help="seconds per reported window")
+    parser.add_argument("--mode", choices=["both", "pooled", "alloc"], default="both")
+    parser.add_argument("--model", choices=sorted(models.MODELS), help=f"detector model (default: {detector.DETECTOR_MODEL})")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    if args.model:
+        detector.select_model(args.model)
+    model = detector.load_net()
+    result = {"source": args.source, "model": detector.DETECTOR_MODEL, "duration_s": args.duration,
+              "opencv": cv2.__version__}
+    for mode in (["alloc", "pooled"] if args.mode == "both" else [args.mode]):
+        result[mode] = soak(model, args.source, mode == "pooled", args.duration, args.window)
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# CPU and per-frame latency of the two streaming modes (ffmpeg encodes to a null sink)
+# Usage: python bench_stream.py [frames] [fps]
+import resource
+import sys
+import time
+
+import numpy as np
+
+from streaming import open_stream
+
+FRAME_WIDTH = 500
+FRAME_HEIGHT = 280
+
+
+def run(mode, frames, fps):
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 255, (FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8) for _ in range(8)]
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_before = time.process_time()
+
+    stream = open_stream(mode, f"bench_{mode}", FRAME_WIDTH, FRAME_HEIGHT, ['-f', 'null', '-'], fps=fps)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(frames):
+        frame_start = time.perf_counter()
+        stream.write(stream.encode(images[i % len(images)]))
+        latencies.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    process = stream.process
+    stream.close()
+    process.wait()
+
+    children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    ffmpeg_cpu = (children_after.ru_utime + children_after.ru_stime) - (children_before.ru_utime + children_before.ru_stime)
+    python_cpu = time.process_time() - cpu_before
+    latencies = np.array(latencies) * 1000
+    print(f"{mode:6s} {frames / elapsed:7.1f} fps | encode+write p50 {np.percentile(latencies, 50):6.2f} ms "
+          f"p95 {np.percentile(latencies, 95):6.2f} ms | CPU python {python_cpu / frames * 1000:5.2f} ms/frame "
+          f"ffmpeg {ffmpeg_cpu / frames * 1000:5.2f} ms/frame")
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    fps = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    print(f"{frames} frames at {FRAME_WIDTH}x{FRAME_HEIGHT}")
+    # mjpeg keeps -re, so ffmpeg paces its input at the stream rate; that pacing shows up as write latency
+    for mode in ("mjpeg", "raw"):
+        run(mode, frames, fps)
+
+
+if __name__ == "__main__":
+    main()
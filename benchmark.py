@@ -0,0 +1,265 @@
+# Per-stage latency benchmark for the detector.
+# Replays a recorded clip or an image directory through the detector code one stage at a time
+# and prints p50/p95/p99 latencies and FPS as JSON, so machines, releases and models can be compared.
+# With ground truth it also reports accuracy (AP@0.5 per class, and precision/recall at the detector's
+# confidence threshold): --annotations is a JSON file of labelled boxes in frame pixels
+# ({"frames": {"<frame index>": [["person", x1, y1, x2, y2], ...]}}, unlisted frames are not scored),
+# --reference scores against another model's detections instead.
+#
+#   python benchmark.py recording.mp4
+#   python benchmark.py frames/ --loops 5 --output bench.json
+#   python benchmark.py synthetic
+#   python benchmark.py recording.mp4 --model ssd_mobilenet_v1_int8 --annotations recording.json
+#   python benchmark.py recording.mp4 --model ssd_mobilenet_v1_int8 --reference ssd_mobilenet_v1
+import argparse
+import json
+import os
+import socket
+import time
+
+import cv2
+import numpy as np
+
+import detector
+import models
+from postprocess import class_mask, postprocess
+from sources import open_source
+from streaming import STREAMS
+from tracker import iou_matrix
+
+STAGES = ["capture", "preprocess", "inference", "postprocess", "overlay", "encode", "write"]
+# A detection matches a ground-truth box of its class overlapping at least this much
+ACCURACY_IOU = 0.5
+# Lowest confidence kept for the precision/recall curve behind AP
+ACCURACY_MIN_CONFIDENCE = 0.3
+# Detections of a --reference model at least this confident are used as ground truth
+REFERENCE_MIN_CONFIDENCE = 0.5
+
+
+def replay(source, loops):
+    """Yield (index in the source, decoded frame) from a video file, image directory or "synthetic",
+    unpaced; decode time is part of each step."""
+    if source == "synthetic":
+        spec = {"type": "synthetic", "frames": 300}
+    elif os.path.isdir(source):
+        spec = {"type": "images", "path": source}
+    else:
+        spec = {"type": "video", "path": source, "realtime": False}
+    for _ in range(loops):
+        frames = open_source({"source": spec}, detector.FRAME_WIDTH, detector.FRAME_HEIGHT)
+        if not frames.open():
+            raise SystemExit(f"Could not open {frames}")
+        index = 0
+        while True:
+            frame = frames.read()
+            if frame is None:
+                break
+            yield index, frame
+            index += 1
+        frames.release()
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def load_annotations(path):
+    """{frame index: [(label, box)]} from an annotations file (see the top of this file)."""
+    with open(path) as f:
+        frames = json.load(f)["frames"]
+    return {int(index): [(label, box) for label, *box in boxes] for index, boxes in frames.items()}
+
+
+class Accuracy:
+    """Greedy VOC-style matching of detections to ground truth, per class, over all scored frames."""
+
+    def __init__(self, classes, threshold):
+        self.threshold = threshold
+        self.scored = {label: [] for label in classes}  # (confidence, matched a ground-truth box)
+        self.positives = dict.fromkeys(classes, 0)
+        self.frames = 0
+
+    def add(self, found, truth):
+        self.frames += 1
+        for label in self.scored:
+            expected = np.array([box for name, box in truth if name == label], dtype=np.float32).reshape(-1, 4)
+            self.positives[label] += len(expected)
+            rows = [i for i, idx in enumerate(found.class_ids) if detector.CLASSES[idx] == label]
+            rows.sort(key=lambda i: -found.confidences[i])
+            ious = iou_matrix(found.boxes[rows].astype(np.float32).reshape(-1, 4), expected)
+            matched = np.zeros(len(expected), dtype=bool)
+            for k, i in enumerate(rows):
+                best = int(np.argmax(ious[k])) if len(expected) else -1
+                hit = best >= 0 and ious[k, best] >= ACCURACY_IOU and not matched[best]
+                if hit:
+                    matched[best] = True
+                self.scored[label].append((float(found.confidences[i]), hit))
+
+    def summary(self):
+        classes = {}
+        for label, scored in self.scored.items():
+            positives = self.positives[label]
+            if not positives and not scored:
+                continue
+            scored.sort(key=lambda s: -s[0])
+            hits = np.array([hit for _, hit in scored], dtype=bool)
+            tp, fp = np.cumsum(hits), np.cumsum(~hits)
+            recall = tp / positives if positives else np.zeros(len(hits))
+            precision = tp / np.maximum(tp + fp, 1)
+            # All-point interpolated AP: area under the precision envelope
+            envelope = np.maximum.accumulate(precision[::-1])[::-1]
+            ap = float(np.sum(np.diff(np.concatenate([[0.0], recall])) * envelope)) if positives else 0.0
+            confident = np.array([confidence > self.threshold for confidence, _ in scored], dtype=bool)
+            found, correct = int(confident.sum()), int(hits[confident].sum())
+            classes[label] = {
+                "ground_truth": positives,
+                "ap50": round(ap, 4),
+                "precision": round(correct / found, 4) if found else None,
+                "recall": round(correct / positives, 4) if positives else None,
+            }
+        aps = [c["ap50"] for c in classes.values() if c["ground_truth"]]
+        return {
+            "frames": self.frames,
+            "iou": ACCURACY_IOU,
+            "confidence_threshold": self.threshold,
+            "map50": round(float(np.mean(aps)), 4) if aps else None,
+            "classes": classes,
+        }
+
+
+def run(source, loops=1, warmup=5, stream_mode="mjpeg", sink="devnull", model=None, annotations=None,
+        reference=None):
+    """Time every stage of the detector on source; with annotations (load_annotations()) or a reference
+    model name, also score the detections."""
+    if model:
+        detector.select_model(model)
+    net = detector.load_net()
+    lut = detector.distance_lut("default")
+    keep = class_mask(detector.CLASSES, detector.DETECT_CLASSES)
+    accuracy = None
+    if annotations is not None or reference:
+        accuracy = Accuracy(detector.DETECT_CLASSES, threshold=0.8)  # postprocess()'s default min_confidence
+    if reference:
+        truth_model = models.load(reference)
+        truth_keep = class_mask(truth_model.labels, detector.DETECT_CLASSES)
+    size = (detector.FRAME_WIDTH, detector.FRAME_HEIGHT)
+    scale = np.array([size[0], size[1], size[0], size[1]], dtype=np.float32)
+
+    stream = STREAMS[stream_mode]("benchmark", size[0], size[1], ['-f', 'null', '-'])
+    if sink == "ffmpeg":
+        stream.open()
+        write = stream.write
+    else:
+        devnull = open(os.devnull, 'wb')
+        write = lambda payload: devnull.write(memoryview(payload).cast('B'))
+
+    timings = {stage: [] for stage in STAGES}
+    frames = replay(source, loops)
+    count = 0
+    total = 0.0
+    while True:
+        t0 = time.perf_counter()
+        index, frame = next(frames, (None, None))
+        if frame is None:
+            break
+        if frame.shape[1::-1] != size:
+            frame = cv2.resize(frame, size)
+        t1 = time.perf_counter()
+        image = cv2.resize(frame, net.size)
+        inputs = net.preprocess([image])
+        t2 = time.perf_counter()
+        detections = net.infer(inputs)[np.newaxis, np.newaxis]
+        t3 = time.perf_counter()
+        found = postprocess(detections, scale, keep, detector.ALERT_MASK, lut, alert_range=detector.ALERT_RANGE)
+        t4 = time.perf_counter()
+        detector.draw_overlay(frame, found, found.in_range.any())
+        t5 = time.perf_counter()
+        payload = stream.encode(frame)
+        t6 = time.perf_counter()
+        write(payload)
+        t7 = time.perf_counter()
+
+        if accuracy is not None:
+            # Outside the timed stages: every detection down to ACCURACY_MIN_CONFIDENCE, for the AP curve
+            scored = postprocess(detections, scale, keep, detector.ALERT_MASK, lut, ACCURACY_MIN_CONFIDENCE)
+            if reference:
+                rows = truth_model.detect([image])  # frame has the overlay drawn on it by now
+                rows = rows[(rows[:, 2] > REFERENCE_MIN_CONFIDENCE) & truth_keep[rows[:, 1].astype(np.intp)]]
+                accuracy.add(scored, [(truth_model.labels[int(row[1])], row[3:7] * scale) for row in rows])
+            elif index in annotations:
+                accuracy.add(scored, annotations[index])
+
+        count += 1
+        if count <= warmup:
+            continue
+        total += t7 - t0
+        for stage, start, end in zip(STAGES, (t0, t1, t2, t3, t4, t5, t6), (t1, t2, t3, t4, t5, t6, t7)):
+            timings[stage].append(end - start)
+
+    if sink == "ffmpeg":
+        stream.close()
+    else:
+        devnull.close()
+    measured = count - warmup
+    if measured <= 0:
+        raise SystemExit(f"Not enough frames in {source} (got {count}, warm-up is {warmup})")
+
+    stages = {stage: percentiles(samples) for stage, samples in timings.items()}
+    slowest = max(stages, key=lambda stage: stages[stage]["mean_ms"])
+    result = {
+        "source": source,
+        "model": detector.DETECTOR_MODEL,
+        "host": socket.gethostname(),
+        "opencv": cv2.__version__,
+        "frames": measured,
+        "frame_size": list(size),
+        "stream_mode": stream_mode,
+        "stages": stages,
+        "fps": {
+            # All stages back to back on one thread (the old main.py loop)
+            "sequential": round(measured / total, 2),
+            # Upper bound with the stages pipelined: set by the slowest stage
+            "pipelined": round(1000 / stages[slowest]["mean_ms"], 2),
+        },
+        "bottleneck": slowest,
+    }
+    if accuracy is not None:
+        result["accuracy"] = accuracy.summary()
+        result["accuracy"]["ground_truth"] = f"model:{reference}" if reference else "annotations"
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark for the detector")
+    parser.add_argument("source", help="video file, directory of images or \"synthetic\"")
+    parser.add_argument("--loops", type=int, default=1, help="replay the source this many times")
+    parser.add_argument("--warmup", type=int, default=5, help="frames to run before timing starts")
+    parser.add_argument("--stream-mode", choices=sorted(STREAMS), default="mjpeg")
+    parser.add_argument("--sink", choices=["devnull", "ffmpeg"], default="devnull",
+                        help="write frames to /dev/null or to an ffmpeg process with a null output")
+    parser.add_argument("--model", choices=sorted(models.MODELS), help=f"detector model (default: {detector.DETECTOR_MODEL})")
+    truth = parser.add_mutually_exclusive_group()
+    truth.add_argument("--annotations", help="JSON file of ground-truth boxes per frame index, to report accuracy")
+    truth.add_argument("--reference", choices=sorted(models.MODELS),
+                       help="report accuracy against this model's detections instead of annotations")
+    parser.add_argument("--output", help="also write the JSON result to this file")
+    args = parser.parse_args()
+
+    annotations = load_annotations(args.annotations) if args.annotations else None
+    result = run(args.source, args.loops, args.warmup, args.stream_mode, args.sink, args.model, annotations,
+                 args.reference)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# Offline distance calibration for the detector.
+# Fits the pinhole model (pixel width = KNOWN_WIDTH * focal / distance + offset) to every reference
+# image of the marker and stores the result per camera in calibration.json, so the detector does not
+# run Canny/contours at startup. Distances are then looked up per class and pixel width in a table.
+#
+#   python calibration.py                    # "default", from images/2ft.png, 3ft.png and 4ft.png
+#   python calibration.py rear --image images/rear_3ft.png:36 --image images/rear_6ft.png:72
+import argparse
+import json
+import os
+
+import cv2
+import numpy as np
+
+CALIBRATION_FILE = "calibration.json"
+# Reference images of the marker and their distance from the camera in inches
+REFERENCE_IMAGES = {"images/2ft.png": 24.0, "images/3ft.png": 36.0, "images/4ft.png": 48.0}
+# Width of the calibration marker in inches
+KNOWN_WIDTH = 11.0
+# Used when no calibration has been stored (the old fallback in main.py)
+DEFAULT_FOCAL_LENGTH = 1000.0
+
+# Typical real-world width in inches per class. person keeps KNOWN_WIDTH, which the 0.1-5.0 m alert
+# window was tuned with; classes not listed fall back to KNOWN_WIDTH as well.
+CLASS_WIDTHS = {
+    "person": KNOWN_WIDTH,
+    "bicycle": 24.0,
+    "motorbike": 30.0,
+    "car": 70.0,
+    "bus": 100.0,
+    "truck": 96.0,
+    "train": 120.0,
+    "horse": 24.0,
+    "cow": 30.0,
+    "sheep": 20.0,
+    "dog": 12.0,
+    "cat": 8.0,
+}
+
+
+def find_marker(image):
+    """Rotated bounding rectangle of the largest contour (the marker)."""
+    import imutils  # Only the offline calibration needs it, so the detector does not load it at startup
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edged = cv2.Canny(gray, 35, 125)
+    cnts = cv2.findContours(edged.copy(), cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    cnts = imutils.grab_contours(cnts)
+    c = max(cnts, key=cv2.contourArea)
+    return cv2.minAreaRect(c)
+
+
+def fit(references, known_width=KNOWN_WIDTH):
+    """Fit focal length and pixel offset to [(marker width in px, distance in inches)].
+
+    With one image the offset is 0 and this is the old single-image formula.
+    """
+    widths = np.array([w for w, _ in references], dtype=np.float64)
+    distances = np.array([d for _, d in references], dtype=np.float64)
+    if len(references) == 1:
+        focal_length, offset = widths[0] * distances[0] / known_width, 0.0
+    else:
+        # widths = (known_width / distance) * focal_length + offset, linear in (focal_length, offset)
+        a = np.stack([known_width / distances, np.ones_like(distances)], axis=1)
+        (focal_length, offset), *_ = np.linalg.lstsq(a, widths, rcond=None)
+    predicted = known_width * focal_length / (widths - offset)
+    return float(focal_length), float(offset), float(np.abs(predicted - distances).max())
+
+
+def calibrate(images, known_width=KNOWN_WIDTH):
+    """Measure the marker in each {path: inches} image and fit the model; returns the entry to store."""
+    references = []
+    for path, inches in images.items():
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Warning: Could not load reference image {path}, skipping")
+            continue
+        width = find_marker(image)[1][0]
+        references.append((width, inches))
+        print(f"{path}: marker {width:.1f} px at {inches:.0f} in")
+    if not references:
+        raise SystemExit("No reference image could be loaded")
+    focal_length, offset, error = fit(references, known_width)
+    print(f"Focal length {focal_length:.1f}, offset {offset:.1f} px, max error {error:.2f} in "
+          f"over {len(references)} images")
+    return {
+        "focal_length": round(focal_length, 3),
+        "offset": round(offset, 3),
+        "known_width": known_width,
+        "max_error_in": round(error, 3),
+        "images": {path: inches for path, inches in images.items()},
+    }
+
+
+def load(camera, path=CALIBRATION_FILE):
+    """Stored calibration for camera, else the "default" entry, else the uncalibrated fallback."""
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+    entry = entries.get(camera) or entries.get("default")
+    if entry is None:
+        print(f"Warning: No calibration for {camera} in {path}, using default focal length")
+        return {"focal_length": DEFAULT_FOCAL_LENGTH, "offset": 0.0, "known_width": KNOWN_WIDTH}
+    return entry
+
+
+def save(camera, entry, path=CALIBRATION_FILE):
+    try:
+        with open(path) as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+    entries[camera] = entry
+    with open(path + ".tmp", 'w') as f:
+        json.dump(entries, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def distance_lut(entry, classes, max_width):
+    """Metres indexed by [class id, box width in px] for widths 0..max_width; inf where the width is too
+    small to give a distance (as the old division by zero did)."""
+    widths = np.arange(max_width + 1, dtype=np.float64) - entry.get("offset", 0.0)
+    real = np.array([CLASS_WIDTHS.get(label, entry.get("known_width", KNOWN_WIDTH)) for label in classes])
+    with np.errstate(divide="ignore"):
+        inches = real[:, None] * entry["focal_length"] / widths[None, :]
+    inches[:, widths <= 0] = np.inf
+    return (inches * 0.0254).astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit the distance model from reference images of the marker")
+    parser.add_argument("camera", nargs="?", default="default", help="camera name, or \"default\" for all cameras")
+    parser.add_argument("--image", action="append", metavar="PATH:INCHES",
+                        help="reference image and its distance in inches (default: images/2ft, 3ft and 4ft)")
+    parser.add_argument("--known-width", type=float, default=KNOWN_WIDTH, help="marker width in inches")
+    parser.add_argument("--output", default=CALIBRATION_FILE)
+    args = parser.parse_args()
+
+    images = REFERENCE_IMAGES
+    if args.image:
+        images = {}
+        for spec in args.image:
+            path, _, inches = spec.rpartition(":")
+            images[path] = float(inches)
+    save(args.camera, calibrate(images, args.known_width), args.output)
+    print(f"Saved {args.camera} calibration to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
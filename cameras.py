@@ -0,0 +1,70 @@
+# Camera definitions for the multi-camera detector (detector.py).
+# Each entry replaces one of the old per-camera scripts (main.py, left.py, right.py, back.py).
+#
+#   device        V4L2 device the camera is attached to (every old script opened /dev/video0: on a
+#                 machine with several cameras attached, set each one's device before enabling it)
+#   position      sensor_position written to the CSV logs
+#   machine_id    Machine_id for detection_log.csv (image_log.csv uses image_machine_id if set)
+#   cxd_id        CxD_id for both logs
+#   sensor_id     Sensor_id for both logs
+#   rtsp_path     path on the Jetson's RTSP server (rtsp://<JETSON_IP>:8554/<rtsp_path>)
+#   alert_phrase  spoken alert, {label} is replaced by the detected class
+#   udp_key       key used in the "class=<label> <udp_key>=<metres>" data datagram
+#   ignore        optional set of classes to drop on top of those not in detector.DETECT_CLASSES
+#   stream_mode   optional streaming.STREAM_MODE override ("raw", "mjpeg", "passthrough" or "null")
+#   source        optional frame source instead of the device, see sources.open_source(), e.g.
+#                 {"type": "video", "path": "recording.mp4", "realtime": True}
+#   roi           optional region the network looks at, in frame pixels: a rectangle (x1, y1, x2, y2)
+#                 or a polygon [(x, y), ...], e.g. (0, 60, 500, 280) to skip the sky. Default: whole frame
+
+CAMERAS = {
+    "rear": {
+        "device": "/dev/video0",
+        "position": "REAR",
+        "machine_id": "DEMO_1",
+        "image_machine_id": "ADT_DEMO_1",
+        "cxd_id": "CxD_DEMO_1",
+        "sensor_id": "REAR_DEMO_1",
+        "rtsp_path": "mystream2",
+        "alert_phrase": "{label} At The Rear, Slow Down",
+        "udp_key": "rear",
+    },
+    "left": {
+        "device": "/dev/video0",
+        "position": "LEFT",
+        "machine_id": "ADT_RIVERSIDE_1",
+        "cxd_id": "CxD_RIVERSIDE_1",
+        "sensor_id": "LEFT_RIVERSIDE_1",
+        "rtsp_path": "mystream3",
+        "alert_phrase": "{label} On The Left Slow Down",
+        "udp_key": "left",
+    },
+    "right": {
+        "device": "/dev/video0",
+        "position": "RIGHT",
+        "machine_id": "ADT_RIVERSIDE_1",
+        "cxd_id": "CxD_RIVERSIDE_1",
+        "sensor_id": "RIGHT_RIVERSIDE_1",
+        "rtsp_path": "mystream4",
+        "alert_phrase": "{label} On The Right Slow Down",
+        "udp_key": "right",
+        "ignore": {"bus", "motorbike"},  # As in the old right.py
+    },
+    # The old back.py, a copy of main.py: same device and stream as "rear"
+    "back": {
+        "device": "/dev/video0",
+        "position": "REAR",
+        "machine_id": "DEMO_1",
+        "image_machine_id": "ADT_DEMO_1",
+        "cxd_id": "CxD_DEMO_1",
+        "sensor_id": "REAR_DEMO_1",
+        "rtsp_path": "mystream2",
+        "alert_phrase": "{label} At The Rear, Slow Down",
+        "udp_key": "rear",
+    },
+}
+
+# Cameras started when detector.py is run without arguments: the rear camera, as modular.service ran
+# main.py. Add "left" and "right" once their devices are set ("back" shares the rear device and stream
+# path, so it is an alternative to "rear")
+ENABLED = ["rear"]
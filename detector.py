@@ -0,0 +1,737 @@
+import time
+STARTED_AT = time.perf_counter()  # Imports below are the first phase of the startup profile
+
+import argparse
+import cv2
+import numpy as np
+import json
+import threading
+import signal
+import sys
+import resource
+from queue import Queue
+import socket
+
+from pipeline import Pipeline, FramePacket, FramePool, STATS_INTERVAL
+from batching import BatchInference
+from postprocess import class_mask, measure, postprocess
+from tracker import BoxTracker
+from alerts import AlertManager
+from motion import MotionGate
+from roi import RegionOfInterest
+import models
+import calibration
+from logwriter import LogWriter
+from snapshot import SnapshotWriter
+from metrics import ALERT_LATENCY_BUCKETS, Histogram, MetricsServer, Registry
+from streaming import STREAM_MODE, STREAMS, open_stream, rtsp_output
+from sources import open_source, parse_source
+from cameras import CAMERAS, ENABLED
+from startup import StartupProfile
+from qos import QOS_LEVELS, QosController, applicable_levels
+from imu import ImuService
+from alert_audio import AlertAudio, alert_phrases
+IMPORTED_AT = time.perf_counter()
+
+# Configuration
+JETSON_IP = "192.168.0.102"  # Jetson's IP
+FRAME_WIDTH = 500
+FRAME_HEIGHT = 280
+UDP_PORT_DATA = 5005  # UDP port for the class/distance datagram
+UPD_PORT_AUDIO = 5006  # UDP port for the spoken alert text
+UDP_PORT_OVERLAY = 5007  # UDP port for the per-frame boxes in passthrough stream mode
+OVERLAY_MAX_BOXES = 20  # Keeps one overlay message inside a single datagram
+
+# Detector model (see models.MODELS); its label map gives the class ids
+DETECTOR_MODEL = models.DEFAULT_MODEL
+CLASSES = models.load_labels(models.MODELS[DETECTOR_MODEL]["labels"])
+
+# Classes that are detected at all (a camera's "ignore" set removes more); the rest of the label map is dropped
+DETECT_CLASSES = ("person", "car", "bus", "motorbike", "truck")
+
+# Classes that raise an alert when inside ALERT_RANGE (metres)
+ALERT_CLASSES = ("person", "car", "truck")
+ALERT_RANGE = (0.1, 5.0)
+ALERT_MASK = class_mask(CLASSES, ALERT_CLASSES)
+
+# Inference cadence: run the network on every Nth frame, or at a fixed rate when INFERENCE_HZ is set.
+# The tracker carries the boxes (and the distance alerts) over the frames in between.
+INFERENCE_EVERY = 3
+INFERENCE_HZ = 0
+# Skip the network on static scenes when nothing is being tracked (see motion.py)
+MOTION_GATE = True
+# Trade cadence, network input size, stream quality and log volume for latency under load (see qos.py)
+QOS = True
+# An alertable object closer than this (metres), or seen that close in the last QOS_PROTECT_HOLD seconds,
+# keeps the QoS controller from slowing detection down
+QOS_PROTECT_RANGE = 2 * ALERT_RANGE[1]
+QOS_PROTECT_HOLD = 2.0
+# Read the IMU (see imu.py) and slow down while the machine stands still: the network runs
+# STATIONARY_CADENCE times less often and the stream sends a new picture only every
+# STATIONARY_STREAM_EVERY frames (streaming.FrameHold: ffmpeg keeps running, so viewers stay connected).
+# Both return to full rate while an alert is possible, as for QoS. Without a working IMU everything
+# runs as if moving.
+IMU = True
+STATIONARY_CADENCE = 3.0
+STATIONARY_STREAM_EVERY = 3
+# At boot the cameras may not be enumerated yet: keep retrying this long (seconds) instead of a fixed sleep
+CAMERA_OPEN_TIMEOUT = 15.0
+# sensor_health drops to DEGRADED when a camera delivers fewer frames per second than this, or ffmpeg restarted
+HEALTH_MIN_FPS = 5.0
+
+COLORS = np.random.uniform(0, 255, size=(len(CLASSES), 3))
+
+# CSV Logging setup
+log_filename = "detection_log.csv"
+image_log_filename = "image_log.csv"
+screenshot_folder = "screenshots"
+
+
+# Initialize voice engine
+def init_voice_engine():
+    try:
+        import pyttsx3  # Loads the speech driver; imported here so it runs in the parallel startup phase
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 150)
+        return engine
+    except Exception as e:
+        print(f"Voice engine warning: {str(e)}")
+        return None
+
+def init_alert_audio(phrases):
+    """The voice engine with the alert phrases rendered (once, see alert_audio.py) and loaded for playback."""
+    return AlertAudio(init_voice_engine()).prepare(phrases)
+
+# Initialize UDP socket
+def init_udp_socket():
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        return sock
+    except Exception as e:
+        print(f"UDP socket error: {str(e)}")
+        return None
+
+# Distance calculation functions
+def distance_lut(camera):
+    """Metres by [class id, box width] from the camera's stored calibration (see calibration.py)."""
+    return calibration.distance_lut(calibration.load(camera), CLASSES, FRAME_WIDTH)
+
+SENSOR_HEADER = [
+    "Machine_id", "CxD_id", "Sensor_id", "Class", "Confidence",
+    "Distance (m)", "Technical", "Emergency_status", "sensor_position",
+    "sensor_health"
+]
+# Capture time and IMU reading of the frame (see DetectorEngine.imu_fields()), in the column order each
+# uploader reads them: dbconn.py for the detection log, dbconn_updated.py for the image log
+DETECTION_HEADER = SENSOR_HEADER + [
+    "detection_datetime", "accelerometer_timestamp", "gyroscope_timestamp", "accelerometer_xyz", "gyroscope_rads"
+]
+IMAGE_HEADER = SENSOR_HEADER + [
+    "timestamp", "image_base64", "accelerometer_timestamp", "accelerometer_xyz", "gyroscope_timestamp", "gyroscope_rads"
+]
+
+def select_model(name):
+    """Switch to another model in models.MODELS before the engine starts: the class lists follow its label map."""
+    global DETECTOR_MODEL, CLASSES, ALERT_MASK, COLORS
+    if name not in models.MODELS:
+        raise SystemExit(f"Unknown model {name!r}, expected one of {', '.join(sorted(models.MODELS))}")
+    DETECTOR_MODEL = name
+    CLASSES = models.load_labels(models.MODELS[name]["labels"])
+    ALERT_MASK = class_mask(CLASSES, ALERT_CLASSES)
+    COLORS = np.random.uniform(0, 255, size=(len(CLASSES), 3))
+
+def load_net(tune=True):
+    """Load DETECTOR_MODEL (models.Detector), on the tuned backend for this host where it has one."""
+    return models.load(DETECTOR_MODEL, tune)
+
+def draw_overlay(frame, found, alert):
+    """Boxes and labels for the detections, plus the red border while an alert fires."""
+    (h, w) = frame.shape[:2]
+    for idx, confidence, (startX, startY, endX, endY), meters in zip(
+            found.class_ids, found.confidences, found.boxes.tolist(), found.meters):
+        label_text = f"{CLASSES[idx]}: {confidence * 100:.2f}% {meters:.2f}m"
+        cv2.rectangle(frame, (startX, startY), (endX, endY), COLORS[idx], 2)
+        y = startY - 15 if startY - 15 > 15 else startY + 15
+        cv2.putText(frame, label_text, (startX, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLORS[idx], 2)
+
+    if alert:
+        cv2.rectangle(frame, (0, 0), (w - 1, h - 1), (0, 0, 255), 15)
+
+def resource_usage():
+    """Peak RSS in MB and total CPU seconds used by this process so far."""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_maxrss / 1024, usage.ru_utime + usage.ru_stime
+
+
+class CameraWorker:
+    """Capture -> inference -> encode -> write pipeline for one camera, using the engine's shared resources."""
+
+    def __init__(self, name, config, engine):
+        self.name = name
+        self.config = config
+        self.engine = engine
+        self.keep = class_mask(CLASSES, DETECT_CLASSES) & ~class_mask(CLASSES, config.get("ignore", ()))
+        self.lut = distance_lut(name)
+        self.roi = None
+        self.stream_mode = config.get("stream_mode", STREAM_MODE)
+        self.alerts = AlertManager(ALERT_RANGE)
+        self.frame_index = 0
+        self.tracker = BoxTracker()
+        self.motion = MotionGate()
+        self.last_inference = float("-inf")
+        self.frames_since_inference = INFERENCE_EVERY  # Run the network on the first frame
+        # Knobs the QoS controller turns (see apply_qos())
+        self.inference_every = INFERENCE_EVERY
+        self.inference_hz = INFERENCE_HZ
+        self.qos_cadence = 1.0
+        self.motion_cadence = 1.0  # And the IMU's (see apply_motion())
+        self.stream_every = 1
+        self.input_size = (300, 300)
+        self.log_every = 1
+        self.alert_possible_at = float("-inf")
+        self.latency = Histogram()  # Capture to written to the stream
+        self.inferred_frames = 0
+        self.tracked_frames = 0
+        self.alerts_sent = 0
+        self.health = "GOOD"
+        self.health_sample = None
+        self.source = None
+        self.stream = None
+        self.frames = FramePool()
+        self.pipeline = Pipeline([
+            ("capture", self.capture),
+            ("inference", self.inference),
+            ("encode", self.annotate),
+            ("write", self.write),
+        ], name=name, release=self.release)
+
+    def open(self, timeout=CAMERA_OPEN_TIMEOUT):
+        """Open the frame source, retrying a live camera until timeout; returns False if it is not available."""
+        self.source = open_source(self.config, FRAME_WIDTH, FRAME_HEIGHT, mjpeg=self.stream_mode == "passthrough")
+        deadline = time.monotonic() + timeout
+        while not self.source.open():
+            self.source.release()
+            if not self.source.live or time.monotonic() >= deadline:
+                print(f"Error: Could not open {self.name} {self.source}.")
+                return False
+            time.sleep(0.5)
+        return True
+
+    def start(self):
+        print(f"Starting {self.name} {FRAME_WIDTH}x{FRAME_HEIGHT} {self.stream_mode} stream to "
+              f"{JETSON_IP}/{self.config['rtsp_path']}")
+        output = rtsp_output(f"rtsp://{JETSON_IP}:8554/{self.config['rtsp_path']}")
+        self.stream = open_stream(self.stream_mode, self.name, FRAME_WIDTH, FRAME_HEIGHT, output)
+        self.pipeline.start()
+        self.health_sample = (time.monotonic(), 0, 0)
+
+    # Stage 1: grab frames as fast as the source delivers them
+    def capture(self):
+        frame = self.source.read(self.frames.acquire())
+        if frame is None:
+            if self.source.live:
+                print(f"Error: Could not read frame from {self.name} {self.source}")
+            else:
+                print(f"{self.name}: end of {self.source}")
+            return None
+        self.frame_index += 1
+        if self.frame_index == 1:
+            self.engine.profile.mark("first frame")
+        packet = FramePacket(self.frame_index, frame, time.monotonic())
+        packet.compressed = self.source.compressed
+        return packet
+
+    # Stage 2: run the shared network (batched with the other cameras), raise alerts and log detections
+    def inference(self, packet):
+        frame = packet.frame
+        if self.roi is None or self.roi.size != self.input_size:
+            (h, w) = frame.shape[:2]
+            self.roi = RegionOfInterest(self.config.get("roi"), w, h, self.input_size)
+        detected = self.due_for_inference(packet.captured_at)
+        if detected and MOTION_GATE and not self.tracker.tracks:
+            # Nothing is being tracked: only run the network if the ROI changed (or on the heartbeat)
+            detected = self.motion.check(self.roi.crop(frame), packet.captured_at)
+        if detected:
+            # Only the ROI goes through the network; boxes come back in full-frame pixels
+            detections = self.engine.batcher.infer(self.name, self.roi.network_input(frame))
+            found = postprocess(detections, self.roi.scale, self.keep, ALERT_MASK, self.lut, alert_range=ALERT_RANGE)
+            self.roi.to_frame(found.boxes)
+            if self.engine.profile.mark("first detection"):
+                self.engine.profile.report()
+                self.engine.profile.save()
+            track_ids = self.tracker.update(found.class_ids, found.confidences, found.boxes, packet.captured_at)
+            self.inferred_frames += 1
+        else:
+            # Between inference frames the tracker moves the last boxes forward
+            self.engine.batcher.skip(self.name)
+            class_ids, confidences, boxes, track_ids = self.tracker.predict(packet.captured_at)
+            found = measure(class_ids, confidences, boxes, ALERT_MASK, self.lut, alert_range=ALERT_RANGE)
+            self.tracked_frames += 1
+        packet.detections = found
+
+        # Only rows that survived the filters reach Python from here on. Smoothed per-track distances
+        # decide the alerts, so each approach costs one alert and one snapshot rather than one per flicker.
+        found.in_range, smoothed, alerts = self.alerts.update(track_ids, found.meters, ALERT_MASK[found.class_ids],
+                                                              packet.captured_at)
+        if (ALERT_MASK[found.class_ids] & (found.meters < QOS_PROTECT_RANGE)).any():
+            self.alert_possible_at = packet.captured_at
+        log_rows = detected and (self.inferred_frames % self.log_every == 0 or found.in_range.any())
+        if alerts or log_rows:
+            fields = self.engine.imu_fields(packet.captured_at)
+        if alerts:
+            i = min(alerts, key=lambda i: smoothed[i])  # Announce the closest object entering the window
+            idx, confidence, meters = found.class_ids[i], found.confidences[i], smoothed[i]
+            self.send_alert(CLASSES[idx], meters, packet.captured_at)
+            packet.alert = True
+            self.engine.snapshots.submit(frame, f"{self.name}_person", self.image_row(idx, confidence, meters),
+                                         [fields[name] for name in IMAGE_HEADER[len(SENSOR_HEADER) + 2:]])
+
+        if log_rows:
+            for idx, confidence, meters in zip(found.class_ids, found.confidences, found.meters):
+                self.engine.log_detection(self.detection_row(idx, confidence, meters, fields))
+        return packet
+
+    def due_for_inference(self, now):
+        """Run the network every INFERENCE_EVERY frames, or at INFERENCE_HZ when that is set (as slowed by QoS and the IMU)."""
+        if self.inference_hz:
+            due = now - self.last_inference >= 1.0 / self.inference_hz
+        else:
+            due = self.frames_since_inference + 1 >= self.inference_every
+        if due:
+            self.last_inference = now
+            self.frames_since_inference = 0
+        else:
+            self.frames_since_inference += 1
+        return due
+
+    # Stage 3: draw the overlay and encode for the stream (JPEG in mjpeg mode, nothing in raw mode)
+    def annotate(self, packet):
+        if not self.stream.overlay:
+            # Passthrough: the camera's JPEG goes out untouched and the display draws the boxes
+            payload = packet.compressed
+            packet.payload = payload if payload is not None else self.stream.encode(packet.frame)
+            self.engine.send_udp(self.overlay_message(packet), UDP_PORT_OVERLAY)
+            return packet
+        self.roi.draw(packet.frame)
+        draw_overlay(packet.frame, packet.detections, packet.alert)
+        packet.payload = self.stream.encode(packet.frame)
+        return packet
+
+    # Stage 4: feed the frame to this camera's ffmpeg
+    def write(self, packet):
+        self.stream.hold.every = self.stream_every
+        self.stream.write(packet.payload)
+        latency = time.monotonic() - packet.captured_at
+        self.latency.observe(latency)
+        if self.engine.qos:
+            self.engine.qos.sample(latency)
+
+    def apply_qos(self, settings):
+        """Settings from QosController.update(); each takes effect from the next frame."""
+        self.qos_cadence = settings["cadence"]
+        self.update_cadence()
+        self.input_size = settings["input_size"]  # The inference stage rebuilds its ROI at this size
+        self.log_every = settings["log_every"]
+        if self.stream:
+            self.stream.quality = settings["stream_quality"]  # Only the streams that encode JPEGs use it
+
+    def apply_motion(self, cadence, stream_every):
+        """Inference cadence multiplier and stream picture interval for the machine's motion state."""
+        self.motion_cadence = cadence
+        self.update_cadence()
+        self.stream_every = stream_every
+
+    def update_cadence(self):
+        cadence = self.qos_cadence * self.motion_cadence
+        self.inference_every = max(1, round(INFERENCE_EVERY * cadence))
+        self.inference_hz = INFERENCE_HZ / cadence
+
+    def release(self, packet):
+        """Called by the pipeline when a packet is written or dropped: its frame buffer can be reused."""
+        self.frames.release(packet.frame)
+        packet.frame = None
+
+    def overlay_message(self, packet):
+        """Compact JSON with what draw_overlay() would have drawn, for eth_audio.py to draw at display time."""
+        found = packet.detections
+        (h, w) = packet.frame.shape[:2]
+        boxes = [[CLASSES[idx], *box, round(float(meters), 2)] for idx, box, meters in
+                 zip(found.class_ids[:OVERLAY_MAX_BOXES], found.boxes[:OVERLAY_MAX_BOXES].tolist(),
+                     found.meters[:OVERLAY_MAX_BOXES])]
+        return json.dumps({"s": self.config["rtsp_path"], "i": packet.index, "w": w, "h": h,
+                           "a": int(packet.alert), "d": boxes}, separators=(",", ":"))
+
+    def send_alert(self, label, meters, captured_at):
+        """captured_at is the frame's monotonic capture time; the data datagram carries it as wall-clock
+        t=<epoch seconds> so the receiver can measure capture-to-alert latency (needs NTP-synced clocks)."""
+        alert_message = self.config["alert_phrase"].format(label=label)
+        self.engine.tts_queue.put((alert_message, self.config["position"], captured_at))  # Local TTS
+        captured_wall = time.time() - (time.monotonic() - captured_at)
+        udp_message = f"class={label} {self.config['udp_key']}={meters:.1f} t={captured_wall:.6f}"
+        self.engine.send_udp(alert_message, UPD_PORT_AUDIO)
+        self.engine.send_udp(udp_message, UDP_PORT_DATA)
+        self.engine.alert_latency(self.config["position"], "udp").observe(time.monotonic() - captured_at)
+        self.alerts_sent += 1
+
+    def check_health(self):
+        """Update sensor_health from the capture rate and ffmpeg restarts since the last check."""
+        now = time.monotonic()
+        captured, restarts = self.pipeline.stages[0].processed, self.stream.restarts
+        then, last_captured, last_restarts = self.health_sample
+        fps = (captured - last_captured) / max(now - then, 1e-9)
+        self.health = "GOOD" if fps >= HEALTH_MIN_FPS and restarts == last_restarts else "DEGRADED"
+        self.health_sample = (now, captured, restarts)
+
+    def sensor_row(self, idx, confidence, meters):
+        return [
+            self.config["machine_id"], self.config["cxd_id"], self.config["sensor_id"],
+            CLASSES[idx], f"{confidence * 100:.2f}",
+            f"{meters:.2f}", "No", "No", self.config["position"], self.health
+        ]
+
+    def detection_row(self, idx, confidence, meters, fields):
+        """detection_log.csv row; fields are the frame's imu_fields()."""
+        return self.sensor_row(idx, confidence, meters) + [fields[name] for name in DETECTION_HEADER[len(SENSOR_HEADER):]]
+
+    def image_row(self, idx, confidence, meters):
+        row = self.sensor_row(idx, confidence, meters)
+        row[0] = self.config.get("image_machine_id", self.config["machine_id"])
+        return row
+
+    def stop(self):
+        self.pipeline.stop()
+        if self.pipeline.started_at is not None:
+            self.pipeline.join(timeout=2)
+        if self.stream:
+            self.stream.close()
+        if self.source:
+            self.source.release()
+
+
+class DetectorEngine:
+    """Drives several cameras from one process with one network, one TTS engine and one UDP socket."""
+
+    def __init__(self, camera_names, profile=None):
+        # Nothing slow happens here: the model, cameras, TTS and log files are set up by start_up()
+        self.profile = profile or StartupProfile(STARTED_AT, IMPORTED_AT)
+        self.tts_queue = Queue()
+        self.alert_latencies = {}  # (position, "udp"/"tts") -> Histogram of capture-to-alert seconds
+        self.udp_lock = threading.Lock()
+        self.audio = None
+        self.udp_socket = None
+        self.model = None
+        self.batcher = None
+        self.log_writer = None
+        self.snapshots = None
+
+        self.cameras = [CameraWorker(name, CAMERAS[name], self) for name in camera_names]
+        self.running = []
+        self.closed = False
+        # JPEG quality only matters to streams that encode JPEGs
+        jpeg = any(camera.stream_mode in ("mjpeg", "passthrough") for camera in self.cameras)
+        self.qos = QosController(levels=applicable_levels(QOS_LEVELS, () if jpeg else ("stream_quality",))) if QOS else None
+        self.imu = ImuService() if IMU else None
+        self.motion = (1.0, 1)  # Cadence multiplier and stream picture interval applied for the motion state
+        self.metrics = MetricsServer(self.register_metrics())
+
+    def open_logs(self):
+        self.log_writer = LogWriter({
+            "detections": (log_filename, DETECTION_HEADER),
+            "images": (image_log_filename, IMAGE_HEADER),
+        })
+        self.snapshots = SnapshotWriter(screenshot_folder, self.log_writer)
+
+    def start_up(self):
+        """Independent setup runs in parallel: the model loads while the cameras open and the spoken alerts are loaded."""
+        steps = {
+            "model": lambda: load_net(tune=False),  # Loaded once for all cameras; tuned below
+            "voice": lambda: init_alert_audio(alert_phrases([c.config for c in self.cameras], ALERT_CLASSES)),
+            "udp socket": init_udp_socket,
+            "log files": self.open_logs,
+        }
+        if self.imu:
+            steps["imu"] = self.imu.open
+        for camera in self.cameras:
+            steps[f"open {camera.name}"] = camera.open
+        results = self.profile.parallel(steps)
+
+        self.model = results["model"]
+        self.audio = results["voice"]
+        self.udp_socket = results["udp socket"]
+        self.voice_thread = threading.Thread(target=self.tts_loop, daemon=True)
+        self.voice_thread.start()
+        self.running = [camera for camera in self.cameras if results[f"open {camera.name}"]]
+        if not self.running:
+            print("Error: No camera could be opened.")
+            sys.exit(1)
+
+        self.batcher = BatchInference(self.model, expected=len(self.running))
+        # After the parallel phase: a first-start tuning benchmark must not run against the camera
+        # opens and phrase rendering, or a contended result would be cached for good
+        self.profile.phase("dnn tuning", self.model.tune)
+        self.profile.phase("warm-up", self.model.warm_up, len(self.running))
+
+    def tts_loop(self):
+        while True:
+            item = self.tts_queue.get()
+            if item is None:
+                break  # Exit loop
+            message, position, captured_at = item
+            first_sample = self.audio.speak(message)
+            if first_sample is not None:
+                self.alert_latency(position, "tts").observe(first_sample - captured_at)
+
+    def alert_latency(self, position, stage):
+        """Capture-to-alert histogram for a camera position, at the UDP send or the first sample of local speech."""
+        key = (position, stage)
+        if key not in self.alert_latencies:
+            self.alert_latencies[key] = Histogram(ALERT_LATENCY_BUCKETS)
+        return self.alert_latencies[key]
+
+    def send_udp(self, message, port):
+        if not self.udp_socket:
+            return
+        try:
+            with self.udp_lock:
+                self.udp_socket.sendto(message.encode(), (JETSON_IP, port))
+        except Exception as e:
+            print(f"UDP send error: {e}")
+
+    def imu_fields(self, captured_at):
+        """detection_datetime and the IMU columns for a frame, from the IMU reading interpolated at its
+        capture time. Never waits for the sensor: with no reading around that time they are N/A."""
+        wall = time.time() - (time.monotonic() - captured_at)
+        fields = {
+            "detection_datetime": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall)),
+            "accelerometer_timestamp": "N/A", "accelerometer_xyz": "N/A",
+            "gyroscope_timestamp": "N/A", "gyroscope_rads": "N/A",
+        }
+        reading = self.imu.ring.at(captured_at) if self.imu else None
+        if reading is not None:
+            stamp = f"{fields['detection_datetime']}.{int(wall % 1 * 1e6):06d}"
+            fields["accelerometer_timestamp"] = fields["gyroscope_timestamp"] = stamp
+            fields["accelerometer_xyz"] = f"{reading[0]:.3f},{reading[1]:.3f},{reading[2]:.3f}"
+            fields["gyroscope_rads"] = f"{np.linalg.norm(reading[3:]):.4f}"  # One number: the rotation rate
+        return fields
+
+    def log_detection(self, row):
+        self.log_writer.write("detections", row)
+
+    def register_metrics(self):
+        """Prometheus metrics, read at scrape time from the counters the pipeline already keeps."""
+        registry = Registry()
+
+        def per_camera(value):
+            return lambda: [({"camera": c.name}, value(c)) for c in self.running]
+
+        def per_stage(value, first=0):
+            return lambda: [({"camera": c.name, "stage": stage.name}, value(c, i, stage))
+                            for c in self.running for i, stage in enumerate(c.pipeline.stages) if i >= first]
+
+        registry.counter("detector_frames_captured_total", "Frames read from the source",
+                         per_camera(lambda c: c.pipeline.stages[0].processed))
+        registry.counter("detector_frames_processed_total", "Frames written to the stream",
+                         per_camera(lambda c: c.pipeline.stages[-1].processed))
+        registry.counter("detector_frames_dropped_total", "Frames dropped in front of a stage (latest frame wins)",
+                         per_stage(lambda c, i, stage: c.pipeline.queues[i - 1].dropped, first=1))
+        registry.gauge("detector_queue_depth", "Frames waiting in front of a stage",
+                       per_stage(lambda c, i, stage: len(c.pipeline.queues[i - 1]), first=1))
+        registry.histogram("detector_stage_latency_seconds", "Time spent in each pipeline stage per frame",
+                           per_stage(lambda c, i, stage: stage.latency))
+        registry.histogram("detector_frame_latency_seconds", "Frame capture to written to the stream",
+                           per_camera(lambda c: c.latency))
+        registry.counter("detector_network_frames_total", "Frames the network ran on",
+                         per_camera(lambda c: c.inferred_frames))
+        registry.counter("detector_tracked_frames_total", "Frames covered by the tracker instead of the network",
+                         per_camera(lambda c: c.tracked_frames))
+        registry.counter("detector_alerts_sent_total", "Alerts sent to TTS and UDP",
+                         per_camera(lambda c: c.alerts_sent))
+        registry.counter("detector_alerts_suppressed_total", "Tracks that re-entered the alert window during cooldown",
+                         per_camera(lambda c: c.alerts.suppressed))
+        registry.counter("detector_motion_gate_checks_total", "Frames the motion gate compared (nothing tracked, network due)",
+                         per_camera(lambda c: c.motion.checked))
+        registry.counter("detector_motion_gate_skipped_total", "Network runs skipped because the ROI did not change",
+                         per_camera(lambda c: c.motion.skipped))
+        registry.gauge("detector_motion_gate_inference_saved_seconds",
+                       "Inference time saved by the motion gate (skipped runs x current forward time per frame)",
+                       per_camera(lambda c: c.motion.skipped * self.batcher.frame_cost()))
+        registry.counter("detector_frame_pool_misses_total", "Frames captured into a new buffer because none was free",
+                         per_camera(lambda c: c.frames.misses))
+        registry.counter("detector_stream_restarts_total", "ffmpeg restarts after a broken pipe",
+                         per_camera(lambda c: c.stream.restarts if c.stream else 0))
+        registry.gauge("detector_sensor_health", "1 if sensor_health is GOOD, 0 if DEGRADED",
+                       per_camera(lambda c: int(c.health == "GOOD")))
+        registry.histogram("detector_alert_latency_seconds",
+                           "Frame capture to alert sent over UDP (stage=udp) or its first local audio sample (stage=tts)",
+                           lambda: [({"position": position, "stage": stage}, histogram)
+                                    for (position, stage), histogram in list(self.alert_latencies.items())])
+        registry.counter("detector_alerts_spoken_total",
+                         "Local spoken alerts, from the pre-rendered clips (source=cache) or synthesized (source=pyttsx3)",
+                         lambda: [({"source": "cache"}, self.audio.played), ({"source": "pyttsx3"}, self.audio.synthesized)])
+        registry.counter("detector_log_rows_written_total", "CSV rows written by the log writer",
+                         lambda: [({}, self.log_writer.rows_written)])
+        registry.counter("detector_snapshots_total", "Alert screenshots taken",
+                         lambda: [({}, self.snapshots.alerts)])
+        if self.imu:
+            registry.gauge("detector_machine_stationary", "1 while the IMU reports the machine standing still",
+                           lambda: [({}, int(self.imu.state == "stationary"))])
+            registry.counter("detector_imu_read_errors_total", "Failed IMU reads",
+                             lambda: [({}, self.imu.errors)])
+        if self.qos:
+            registry.gauge("detector_qos_level", "QoS degradation level, 0 = full quality (see qos.QOS_LEVELS)",
+                           lambda: [({}, self.qos.level)])
+            registry.counter("detector_qos_adjustments_total", "Changes to the QoS settings",
+                             lambda: [({}, self.qos.adjustments)])
+        return registry
+
+    def report(self):
+        for camera in self.running:
+            camera.pipeline.report()
+            total = camera.inferred_frames + camera.tracked_frames
+            if total:
+                print(f"[{camera.name}] network on {camera.inferred_frames / total * 100:.0f}% of frames, "
+                      f"tracker on the rest | motion gate hit rate {camera.motion.hit_rate() * 100:.0f}%, "
+                      f"~{camera.motion.skipped * self.batcher.frame_cost() * 1000:.0f} ms of inference saved")
+            print(f"[{camera.name}] {camera.alerts.alerts} alerts, {camera.alerts.suppressed} suppressed by cooldown, "
+                  f"{len(camera.alerts.states)} tracks followed | {camera.frames.misses} frame pool misses")
+        for (position, stage), histogram in sorted(self.alert_latencies.items()):
+            print(f"[alert latency] {position} {stage}: {histogram.count} alerts | "
+                  f"p50 <= {histogram.quantile(0.5) * 1000:.0f} ms, p95 <= {histogram.quantile(0.95) * 1000:.0f} ms, "
+                  f"mean {histogram.sum / histogram.count * 1000:.0f} ms")
+        print(f"[alert audio] {len(self.audio.clips)} phrases cached, output {'open' if self.audio.streams else 'closed'} | "
+              f"{self.audio.played} played from the cache, {self.audio.synthesized} synthesized by pyttsx3")
+        self.batcher.report()
+        if self.qos:
+            print(f"[qos] level {self.qos.level} | {self.qos.adjustments} adjustments | "
+                  + ", ".join(f"{knob} {value}" for knob, value in self.qos.settings.items()))
+        if self.imu:
+            print(f"[imu] {self.imu.state} | {self.imu.samples} samples, {self.imu.errors} read errors")
+        self.snapshots.report()
+        rss, cpu = resource_usage()
+        elapsed = time.monotonic() - self.started_at
+        print(f"[engine] {len(self.running)} cameras | peak RSS {rss:.1f} MB | "
+              f"CPU {cpu / elapsed * 100:.0f}% of one core")
+
+    def run(self, interval=STATS_INTERVAL):
+        self.start_up()
+        self.started_at = time.monotonic()
+        for camera in self.running:
+            self.profile.phase(f"start {camera.name}", camera.start)
+            if self.qos:
+                camera.apply_qos(self.qos.settings)
+        self.metrics.start()
+
+        last_report = time.monotonic()
+        while any(camera.pipeline.is_alive() for camera in self.running):
+            time.sleep(0.5)
+            self.check_pipelines()
+            self.update_rates()
+            if time.monotonic() - last_report >= interval:
+                for camera in self.running:
+                    camera.check_health()
+                self.report()
+                last_report = time.monotonic()
+        self.check_pipelines()
+        self.report()
+
+    def check_pipelines(self):
+        """Stop the engine when a camera's pipeline failed, rather than run on without its detections."""
+        failed = [camera for camera in self.running if camera.pipeline.error]
+        if failed:
+            raise RuntimeError("; ".join(f"{camera.name} {camera.pipeline.error}" for camera in failed))
+
+    def update_rates(self):
+        """Follow the QoS controller and the IMU's motion state; both back off while an alert is possible."""
+        now = time.monotonic()
+        alerting = any(now - camera.alert_possible_at < QOS_PROTECT_HOLD for camera in self.running)
+        settings = self.qos.update(alerting, now) if self.qos else None
+        if settings:
+            for camera in self.running:
+                camera.apply_qos(settings)
+
+        state = self.imu.state if self.imu else "unknown"
+        stationary = state == "stationary"
+        slow = stationary and not alerting
+        motion = (STATIONARY_CADENCE if slow else 1.0, STATIONARY_STREAM_EVERY if slow else 1)
+        if motion != self.motion:
+            print(f"[imu] {state}{', alert possible' if alerting else ''}: "
+                  f"inference interval x{motion[0]:g}, stream picture every {motion[1]} frames")
+            self.motion = motion
+            for camera in self.running:
+                camera.apply_motion(*motion)
+
+    def cleanup(self):
+        if self.closed:
+            return
+        self.closed = True
+        print("\nClosing resources...")
+        self.metrics.stop()
+        if self.batcher:
+            self.batcher.stop()
+        if self.imu:
+            self.imu.stop()
+        for camera in self.cameras:
+            camera.stop()
+        if self.snapshots:
+            self.snapshots.close()
+        if self.log_writer:
+            self.log_writer.close()  # Drain queued rows before exiting
+        self.tts_queue.put(None)
+        if self.audio:
+            self.voice_thread.join(timeout=3.0)  # Let a clip that is playing finish before its stream closes
+            self.audio.close()
+        if self.udp_socket:  # Close UDP socket
+            self.udp_socket.close()
+
+
+def main(camera_names=None, source=None, stream_mode=None, model=None):
+    """Run the named cameras (default: argv or ENABLED).
+
+    model picks another detector from models.MODELS. source and stream_mode override every camera's config, e.g. main(source="synthetic", stream_mode="null")
+    runs the whole pipeline without cameras, ffmpeg or an RTSP server. From the command line:
+
+        python detector.py rear left --source video:recording.mp4 --stream null --model ssd_mobilenet_v1_int8
+    """
+    if camera_names is None:
+        parser = argparse.ArgumentParser(description="Multi-camera detector")
+        parser.add_argument("cameras", nargs="*", help=f"cameras to run (default: {' '.join(ENABLED)})")
+        parser.add_argument("--source", help='frame source for all cameras: "synthetic", "video:<file>", '
+                                             '"images:<dir>" or "v4l2:<device>"')
+        parser.add_argument("--stream", dest="stream_mode", choices=sorted(STREAMS),
+                            help="stream mode for all cameras")
+        parser.add_argument("--model", choices=sorted(models.MODELS), help=f"detector model (default: {DETECTOR_MODEL})")
+        args = parser.parse_args()
+        camera_names, source, stream_mode, model = args.cameras, args.source, args.stream_mode, args.model
+    camera_names = camera_names or ENABLED
+    unknown = [name for name in camera_names if name not in CAMERAS]
+    if unknown:
+        print(f"Unknown camera(s): {', '.join(unknown)}. Known: {', '.join(CAMERAS)}")
+        sys.exit(1)
+    for name in camera_names:
+        if source:
+            CAMERAS[name]["source"] = parse_source(source)
+        if stream_mode:
+            CAMERAS[name]["stream_mode"] = stream_mode
+    if model:
+        select_model(model)
+
+    engine = DetectorEngine(camera_names)
+
+    def shutdown():
+        engine.cleanup()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, lambda s, f: shutdown())
+    signal.signal(signal.SIGTERM, lambda s, f: shutdown())
+
+    try:
+        engine.run()
+    except Exception as e:
+        print(f"Error: {e}")
+        engine.cleanup()
+        sys.exit(1)  # A failure exit, so systemd restarts the service (Restart=on-failure)
+    finally:
+        engine.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import json
+import os
+import socket
+import time
+
+import cv2
+import numpy as np
+
+# Chosen settings are cached per host, OpenCV version and model so later starts skip the benchmark
+TUNING_CACHE = "dnn_tuning.json"
+TUNING_RUNS = 5
+
+BACKEND_NAMES = {
+    cv2.dnn.DNN_BACKEND_DEFAULT: "default",
+    cv2.dnn.DNN_BACKEND_OPENCV: "opencv",
+    cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE: "inference_engine",
+}
+TARGET_NAMES = {
+    cv2.dnn.DNN_TARGET_CPU: "cpu",
+}
+if hasattr(cv2.dnn, "DNN_TARGET_CPU_FP16"):
+    TARGET_NAMES[cv2.dnn.DNN_TARGET_CPU_FP16] = "cpu_fp16"
+
+
+def synthetic_blob(batch=1, size=(300, 300)):
+    image = np.random.default_rng(0).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    return cv2.dnn.blobFromImages([image] * batch, 0.007843, size, 127.5)
+
+
+def candidates():
+    """(backend, target, threads) combinations available on this build and machine."""
+    cpus = os.cpu_count() or 1
+    threads = sorted({1, max(cpus // 2, 1), cpus})
+    combos = []
+    for backend in BACKEND_NAMES:
+        try:
+            targets = cv2.dnn.getAvailableTargets(backend)
+        except cv2.error:
+            continue
+        for target in targets:
+            if target in TARGET_NAMES:
+                combos.extend((int(backend), int(target), n) for n in threads)
+    return combos or [(cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU, cpus)]
+
+
+def apply(net, setting):
+    backend, target, threads = setting
+    cv2.setNumThreads(threads)
+    net.setPreferableBackend(backend)
+    net.setPreferableTarget(target)
+
+
+def benchmark(net, runs=TUNING_RUNS):
+    """Time each candidate on a synthetic 300x300 blob; returns (fastest setting, results)."""
+    blob = synthetic_blob()
+    results = []
+    for setting in candidates():
+        try:
+            apply(net, setting)
+            net.setInput(blob)
+            net.forward()  # First call sets the graph up for this backend
+            start = time.perf_counter()
+            for _ in range(runs):
+                net.setInput(blob)
+                net.forward()
+            results.append((setting, (time.perf_counter() - start) / runs))
+        except cv2.error as e:
+            print(f"DNN tuning: skipping {describe(setting)}: {e}")
+    if not results:
+        return None, results
+    return min(results, key=lambda r: r[1])[0], results
+
+
+def describe(setting):
+    backend, target, threads = setting
+    return f"{BACKEND_NAMES.get(backend, backend)}/{TARGET_NAMES.get(target, target)}/{threads} threads"
+
+
+def cache_key(model):
+    return f"{socket.gethostname()}|{cv2.__version__}|{os.path.basename(model)}"
+
+
+def load_cached(model, path=TUNING_CACHE):
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(cache_key(model))
+    except (OSError, ValueError):
+        return None
+    if entry:
+        return entry["backend"], entry["target"], entry["threads"]
+    return None
+
+
+def save_cached(model, setting, ms, path=TUNING_CACHE):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    backend, target, threads = setting
+    cache[cache_key(model)] = {"backend": backend, "target": target, "threads": threads, "ms": round(ms, 2)}
+    with open(path + ".tmp", 'w') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def tune(net, model, path=TUNING_CACHE):
+    """Apply the fastest backend/target/thread count for this host, benchmarking only on the first start."""
+    setting = load_cached(model, path)
+    if setting:
+        apply(net, setting)
+        print(f"DNN tuning: using cached {describe(setting)}")
+        return setting
+
+    setting, results = benchmark(net)
+    for candidate, seconds in results:
+        print(f"DNN tuning: {describe(candidate)} {seconds * 1000:.1f} ms")
+    if setting is None:
+        print("DNN tuning: no candidate worked, keeping OpenCV defaults")
+        return None
+    apply(net, setting)
+    ms = dict(results)[setting] * 1000
+    save_cached(model, setting, ms, path)
+    print(f"DNN tuning: selected {describe(setting)} ({ms:.1f} ms)")
+    return setting
+
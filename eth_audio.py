@@ -7,6 +7,39 @@ from PIL import Image, ImageTk
 from datetime import datetime
 import socket  # New import for UDP
 import pyttsx3  # New import for TTS
+import json  # Overlay side channel
+from bisect import bisect_left
+
+# Capture-to-alert latency buckets (seconds), the detector's metrics.ALERT_LATENCY_BUCKETS. This script
+# runs on the display unit without the detector's modules, so it keeps its own small histogram.
+ALERT_LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0)
+
+
+class Histogram:
+    """Latency samples counted into fixed buckets (+Inf last)."""
+
+    def __init__(self, buckets=ALERT_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (0 when empty)."""
+        if not self.count:
+            return 0.0
+        total = 0
+        for le, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            if total >= q * self.count:
+                return le
+        return float("inf")
+
 
 class RTSPViewerApp:
     def __init__(self, root):
@@ -19,10 +52,18 @@ class RTSPViewerApp:
         # Initialize TTS engine
         self.voice_engine = pyttsx3.init()
         self.voice_engine.setProperty('rate', 150)
+        self.voice_engine.connect('started-utterance', self.on_speech_started)
+
+        # Capture-to-alert latency per camera position: {position: {"receive": Histogram, "speech": Histogram}}
+        self.alert_latency = {}
+        self.speaking = None  # (position, capture time) of the alert being spoken
         
         # UDP configuration
         self.udp_ip = "0.0.0.0"  # Listen on all interfaces
         self.udp_port = 5005
+        self.overlay_port = 5007  # Boxes for streams sent in passthrough mode
+        self.overlay_max_age = 0.5  # Seconds an overlay stays on screen without a newer one
+        self.overlays = [None] * 4  # (receive time, message) per stream
         self.running = True
         
         # Create a grid layout
@@ -127,6 +168,10 @@ class RTSPViewerApp:
         self.udp_thread = threading.Thread(target=self.listen_for_alerts, daemon=True)
         self.udp_thread.start()
 
+        # Start overlay listener thread
+        self.overlay_thread = threading.Thread(target=self.listen_for_overlays, daemon=True)
+        self.overlay_thread.start()
+
     def listen_for_alerts(self):
         """Listen for UDP alerts and speak them"""
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -135,8 +180,16 @@ class RTSPViewerApp:
         while self.running:
             try:
                 data, _ = sock.recvfrom(1024)
-                message = data.decode()
-                print(f"ALERT: {message}")
+                received_at = time.time()
+                message, position, captured_at = self.parse_alert(data.decode())
+                if captured_at is not None:
+                    latency = received_at - captured_at
+                    self.latency_histogram(position, "receive").observe(latency)
+                    print(f"ALERT: {message} (capture to receive {latency * 1000:.0f} ms)")
+                    self.speaking = (position, captured_at)
+                else:
+                    print(f"ALERT: {message}")
+                    self.speaking = None
                 
                 # Speak the alert
                 self.voice_engine.say(message)
@@ -148,6 +201,88 @@ class RTSPViewerApp:
         
         sock.close()
 
+    def listen_for_overlays(self):
+        """Keep the latest detection overlay per stream (sent by detector.py in passthrough mode)"""
+        paths = [url.rsplit("/", 1)[-1] for url in self.stream_urls]
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.udp_ip, self.overlay_port))
+        sock.settimeout(1.0)
+
+        while self.running:
+            try:
+                data, _ = sock.recvfrom(4096)
+                message = json.loads(data.decode())
+                if message["s"] in paths:
+                    self.overlays[paths.index(message["s"])] = (time.time(), message)
+            except socket.timeout:
+                continue
+            except Exception as e:
+                if self.running:
+                    print(f"Overlay Error: {e}")
+
+        sock.close()
+
+    def draw_overlay(self, stream_index, frame):
+        """Draw the boxes and alert border from the side channel onto a displayed frame"""
+        overlay = self.overlays[stream_index]
+        if overlay is None or time.time() - overlay[0] > self.overlay_max_age:
+            return
+        message = overlay[1]
+        sx = frame.shape[1] / message["w"]
+        sy = frame.shape[0] / message["h"]
+        for label, x1, y1, x2, y2, meters in message["d"]:
+            color = (0, 0, 255) if message["a"] else (0, 255, 0)
+            x1, y1, x2, y2 = int(x1 * sx), int(y1 * sy), int(x2 * sx), int(y2 * sy)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            y = y1 - 15 if y1 - 15 > 15 else y1 + 15
+            cv2.putText(frame, f"{label}: {meters:.2f}m", (x1, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        if message["a"]:
+            cv2.rectangle(frame, (0, 0), (frame.shape[1] - 1, frame.shape[0] - 1), (0, 0, 255), 15)
+
+    def parse_alert(self, message):
+        """Split "class=person rear=1.5 t=<capture epoch>" into the text to speak, the position and the
+        capture time. Messages without a valid t= (older detectors) return None for both: the alert is
+        still spoken, only its latency is not measured."""
+        words = message.split()
+        captured_at = None
+        position = None
+        for word in words:
+            key, _, value = word.partition("=")
+            if key == "t":
+                try:
+                    captured_at = float(value)
+                except ValueError:
+                    print(f"Alert without a valid capture time: {word}")
+            elif value and key != "class":
+                position = key
+        text = " ".join(w for w in words if not w.startswith("t="))
+        if captured_at is None:
+            return text, None, None
+        return text, position, captured_at
+
+    def latency_histogram(self, position, stage):
+        histograms = self.alert_latency.setdefault(position, {})
+        if stage not in histograms:
+            histograms[stage] = Histogram(ALERT_LATENCY_BUCKETS)
+        return histograms[stage]
+
+    def on_speech_started(self, name):
+        if self.speaking:
+            position, captured_at = self.speaking
+            self.speaking = None
+            latency = time.time() - captured_at
+            self.latency_histogram(position, "speech").observe(latency)
+            print(f"Speech started {latency * 1000:.0f} ms after capture ({position})")
+
+    def report_latency(self):
+        """Print capture-to-receive and capture-to-speech latency per position."""
+        for position, histograms in sorted(self.alert_latency.items()):
+            for stage, histogram in sorted(histograms.items()):
+                print(f"[alert latency] {position} capture to {stage}: {histogram.count} alerts | "
+                      f"p50 <= {histogram.quantile(0.5) * 1000:.0f} ms, "
+                      f"p95 <= {histogram.quantile(0.95) * 1000:.0f} ms, "
+                      f"mean {histogram.sum / histogram.count * 1000:.0f} ms")
+
     def receive_stream(self, stream_index):
         url = self.stream_urls[stream_index]
         cap = None
@@ -180,6 +315,7 @@ class RTSPViewerApp:
                     self.set_connecting_state(stream_index, False)
                 
                 frame = cv2.resize(frame, (frame_width, frame_height))
+                self.draw_overlay(stream_index, frame)
                 frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
                 img = Image.fromarray(frame)
                 img_tk = ImageTk.PhotoImage(image=img)
@@ -261,7 +397,10 @@ class RTSPViewerApp:
             self.watchdog_thread.join()
         if hasattr(self, 'udp_thread'):
             self.udp_thread.join()
+        if hasattr(self, 'overlay_thread'):
+            self.overlay_thread.join()
         self.voice_engine.stop()
+        self.report_latency()
         self.root.destroy()
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+# IMU sampling for the detector: reads the accelerometer and gyroscope in a background thread into a
+# ring buffer (for the IMU columns of the detection log, see ImuRing.at()) and classifies the machine as
+# "moving" or "stationary" ("unknown" without a sensor, which the detector treats like moving). Run on
+# its own to check the sensor and thresholds on a machine:
+#
+#   python imu.py
+import argparse
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# MPU-6050 (or MPU-9250/6500, same registers) on the Jetson's I2C bus
+IMU_BUS = 1
+IMU_ADDRESS = 0x68
+IMU_RATE_HZ = 200
+# Readings kept for the detection log lookups (seconds), and the longest gap between two readings
+# that is still interpolated across (a longer one means the sensor stalled: the columns stay N/A)
+IMU_BUFFER_SECONDS = 30.0
+IMU_MAX_GAP = 0.05
+# Motion is judged over the last IMU_WINDOW seconds: moving when the accelerometer magnitude varies
+# by more than IMU_ACCEL_MOVING (m/s^2, standard deviation) or the machine turns faster than
+# IMU_GYRO_MOVING (rad/s, mean). Vibration of an idling engine stays under both.
+IMU_WINDOW = 1.0
+IMU_ACCEL_MOVING = 0.3
+IMU_GYRO_MOVING = 0.1
+# Moving is reported at once; stationary only after this long without motion (seconds)
+IMU_STATIONARY_AFTER = 10.0
+
+GRAVITY = 9.80665
+
+_PWR_MGMT_1 = 0x6B
+_SMPLRT_DIV = 0x19
+_CONFIG = 0x1A
+_GYRO_CONFIG = 0x1B
+_ACCEL_CONFIG = 0x1C
+_ACCEL_XOUT_H = 0x3B
+_ACCEL_SCALE = GRAVITY / 16384.0  # +-2 g range, LSB -> m/s^2
+_GYRO_SCALE = math.radians(1 / 131.0)  # +-250 deg/s range, LSB -> rad/s
+
+
+class Mpu6050:
+    """Raw accelerometer (m/s^2) and gyroscope (rad/s) readings over I2C."""
+
+    def __init__(self, bus=IMU_BUS, address=IMU_ADDRESS):
+        self.bus_number = bus
+        self.address = address
+        self.bus = None
+
+    def open(self):
+        from smbus2 import SMBus  # Only needed on machines with an IMU
+        self.bus = SMBus(self.bus_number)
+        self.bus.write_byte_data(self.address, _PWR_MGMT_1, 0x00)  # Wake up
+        self.bus.write_byte_data(self.address, _SMPLRT_DIV, 0x04)  # 1 kHz / (1 + 4) = 200 Hz
+        self.bus.write_byte_data(self.address, _CONFIG, 0x03)  # 44 Hz low-pass filter
+        self.bus.write_byte_data(self.address, _GYRO_CONFIG, 0x00)
+        self.bus.write_byte_data(self.address, _ACCEL_CONFIG, 0x00)
+
+    def read(self):
+        """(ax, ay, az, gx, gy, gz) from one 14-byte burst (the two temperature bytes are skipped)."""
+        data = self.bus.read_i2c_block_data(self.address, _ACCEL_XOUT_H, 14)
+        values = [int.from_bytes(data[i:i + 2], "big", signed=True) for i in range(0, 14, 2)]
+        return tuple(v * _ACCEL_SCALE for v in values[:3]) + tuple(v * _GYRO_SCALE for v in values[4:])
+
+    def close(self):
+        if self.bus:
+            self.bus.close()
+            self.bus = None
+
+    def __str__(self):
+        return f"MPU-6050 at 0x{self.address:02x} on I2C bus {self.bus_number}"
+
+
+class ImuRing:
+    """The last capacity readings in preallocated arrays, written by the sampling thread only.
+
+    Readers take no lock: at() binary-searches the timestamps, then checks the writer has not wrapped
+    around onto the slots it used in the meantime.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.float64)  # time.monotonic() of each reading
+        self.values = np.zeros((capacity, 6), dtype=np.float64)  # ax, ay, az (m/s^2), gx, gy, gz (rad/s)
+        self.count = 0  # Readings ever written; slot of reading k is k % capacity
+
+    def append(self, t, reading):
+        i = self.count % self.capacity
+        self.times[i] = t
+        self.values[i] = reading
+        self.count += 1  # Published only once the slot is complete
+
+    def at(self, t, max_gap=IMU_MAX_GAP):
+        """Reading linearly interpolated at monotonic time t, or None when t is not covered (older than
+        the buffer, newer than the last reading by more than max_gap, or inside a sensor stall)."""
+        count = self.count
+        first = max(0, count - self.capacity + 1)  # The oldest slot is the next one overwritten
+        if count - first < 1:
+            return None
+        lo, hi = first, count  # First reading after t
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[mid % self.capacity] <= t:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == first:
+            return None
+        before = (lo - 1) % self.capacity
+        t0 = self.times[before]
+        if lo == count:
+            # Newer than the last reading (the frame loop does not wait for the next one)
+            value = self.values[before].copy() if t - t0 <= max_gap else None
+        else:
+            after = lo % self.capacity
+            t1 = self.times[after]
+            if t1 - t0 > max_gap:
+                return None
+            w = (t - t0) / (t1 - t0)
+            value = self.values[before] * (1.0 - w) + self.values[after] * w
+        if self.count - self.capacity >= lo - 1:
+            return None  # Overwritten while we were reading
+        return value
+
+
+class ImuService(threading.Thread):
+    """Samples the sensor at IMU_RATE_HZ and keeps the motion state up to date for the detector."""
+
+    def __init__(self, sensor=None, rate=IMU_RATE_HZ):
+        super().__init__(name="imu", daemon=True)
+        self.sensor = sensor or Mpu6050()
+        self.period = 1.0 / rate
+        self.ring = ImuRing(int(IMU_BUFFER_SECONDS * rate))
+        self.window = deque()  # (t, |accel|, |gyro|) over the last IMU_WINDOW seconds
+        self.state = "unknown"
+        self.last_motion = float("-inf")
+        self.samples = 0
+        self.errors = 0
+        self.running = False
+
+    def open(self):
+        """Open the sensor and start sampling; returns False (state stays "unknown") if it is not there."""
+        try:
+            self.sensor.open()
+        except Exception as e:
+            print(f"IMU warning: {self.sensor} not available ({e}), running at full rate")
+            return False
+        self.last_motion = time.monotonic()  # Stationary only after IMU_STATIONARY_AFTER of actual readings
+        self.running = True
+        self.start()
+        return True
+
+    def run(self):
+        next_sample = time.monotonic()
+        while self.running:
+            try:
+                reading = self.sensor.read()
+            except OSError as e:
+                # A glitch on the bus: report unknown (full rate) until readings come back
+                self.errors += 1
+                if self.state != "unknown":
+                    print(f"IMU read error: {e}")
+                    self.state = "unknown"
+                self.window.clear()
+                self.last_motion = time.monotonic()
+            else:
+                self.add(time.monotonic(), reading)
+            next_sample += self.period
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+
+    def add(self, t, reading):
+        ax, ay, az, gx, gy, gz = reading
+        self.ring.append(t, reading)
+        self.samples += 1
+        self.window.append((t, math.sqrt(ax * ax + ay * ay + az * az), math.sqrt(gx * gx + gy * gy + gz * gz)))
+        while self.window[0][0] < t - IMU_WINDOW:
+            self.window.popleft()
+        if len(self.window) < 2:
+            return
+        accel = [a for _, a, _ in self.window]
+        mean = sum(accel) / len(accel)
+        accel_std = math.sqrt(sum((a - mean) ** 2 for a in accel) / len(accel))
+        gyro = sum(g for _, _, g in self.window) / len(self.window)
+        if accel_std > IMU_ACCEL_MOVING or gyro > IMU_GYRO_MOVING:
+            self.last_motion = t
+            self.state = "moving"
+        elif t - self.last_motion >= IMU_STATIONARY_AFTER:
+            self.state = "stationary"
+        elif self.state == "unknown":
+            self.state = "moving"  # Until it has been still for IMU_STATIONARY_AFTER
+
+    def stop(self):
+        self.running = False
+        if self.is_alive():
+            self.join(timeout=1.0)
+        self.sensor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the IMU's motion state and readings")
+    parser.add_argument("--bus", type=int, default=IMU_BUS)
+    parser.add_argument("--address", type=lambda v: int(v, 0), default=IMU_ADDRESS)
+    args = parser.parse_args()
+
+    service = ImuService(Mpu6050(args.bus, args.address))
+    if not service.open():
+        raise SystemExit(1)
+    try:
+        while True:
+            time.sleep(1.0)
+            window = list(service.window)
+            accel = [a for _, a, _ in window] or [0.0]
+            gyro = [g for _, _, g in window] or [0.0]
+            print(f"{service.state:<10} |accel| {min(accel):.2f}-{max(accel):.2f} m/s^2 | "
+                  f"|gyro| max {max(gyro):.3f} rad/s | {service.samples} samples, {service.errors} errors")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import csv
+import os
+import threading
+import time
+from queue import Queue, Empty
+
+# Flush policy: write buffered rows to disk after this many seconds or this many rows,
+# whichever comes first. FSYNC also forces them onto the SD card at each flush.
+FLUSH_INTERVAL = 1.0
+FLUSH_ROWS = 50
+FSYNC = False
+
+
+class _LogFile:
+    def __init__(self, path, header):
+        self.path = path
+        self.header = header
+        self.file = None
+        self.writer = None
+        self.inode = None
+
+    def open(self):
+        self.update_header()
+        self.file = open(self.path, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        if self.file.tell() == 0:
+            self.writer.writerow(self.header)
+
+    def update_header(self):
+        """Rewrite the header of an existing file written with other columns (e.g. before the IMU columns
+        were added). Its rows are kept: the uploaders read columns by position and default missing ones."""
+        try:
+            with open(self.path, newline='') as f:
+                first = next(csv.reader(f), None)
+        except FileNotFoundError:
+            return
+        if first is None or first == self.header:
+            return
+        print(f"{self.path}: header does not match the logged columns, rewriting it")
+        temporary = self.path + ".header.tmp"  # Not dbconn.py's .tmp
+        with open(self.path, newline='') as src, open(temporary, 'w', newline='') as dst:
+            rows = csv.reader(src)
+            if first[0] == self.header[0]:
+                next(rows)  # The old header; otherwise the file had none and its first line is a row
+            writer = csv.writer(dst)
+            writer.writerow(self.header)
+            writer.writerows(rows)
+        os.replace(temporary, self.path)
+
+    def ensure_open(self):
+        """Reopen if the file was replaced or removed (dbconn.py rewrites detection_log.csv in place)."""
+        try:
+            replaced = os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            replaced = True
+        if self.file is None or replaced:
+            self.close()
+            self.open()
+
+    def flush(self, fsync):
+        if self.file:
+            self.file.flush()
+            if fsync:
+                os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+class LogWriter:
+    """Background CSV writer. The detector calls write() and never touches the files itself.
+
+    files maps a log name to (path, header); each file stays open and rows are written in batches.
+    close() drains everything still queued before returning.
+    """
+
+    def __init__(self, files, flush_interval=FLUSH_INTERVAL, flush_rows=FLUSH_ROWS, fsync=FSYNC):
+        self.files = {name: _LogFile(path, header) for name, (path, header) in files.items()}
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.fsync = fsync
+        self.queue = Queue()
+        self.rows_written = 0
+        for log in self.files.values():
+            log.open()
+        self.thread = threading.Thread(target=self.run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, name, row):
+        self.queue.put((name, row))
+
+    def run(self):
+        pending = {name: [] for name in self.files}
+        buffered = 0
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            timeout = max(self.flush_interval - (time.monotonic() - last_flush), 0.01)
+            try:
+                item = self.queue.get(timeout=timeout)
+                while True:
+                    if item is None:
+                        running = False
+                        break
+                    name, row = item
+                    pending[name].append(row)
+                    buffered += 1
+                    item = self.queue.get_nowait()
+            except Empty:
+                pass
+
+            if buffered and (not running or buffered >= self.flush_rows
+                             or time.monotonic() - last_flush >= self.flush_interval):
+                self.write_batch(pending)
+                buffered = 0
+            if buffered == 0:
+                last_flush = time.monotonic()
+
+    def write_batch(self, pending):
+        for name, rows in pending.items():
+            if not rows:
+                continue
+            log = self.files[name]
+            try:
+                log.ensure_open()
+                log.writer.writerows(rows)
+                log.flush(self.fsync)
+                self.rows_written += len(rows)
+            except OSError as e:
+                print(f"Log write error ({log.path}): {e}")
+            rows.clear()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        for log in self.files.values():
+            log.close()
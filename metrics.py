@@ -0,0 +1,139 @@
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus text endpoint: curl http://127.0.0.1:9108/metrics
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+# Upper bounds in seconds for the latency histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Capture-to-alert latency includes waiting behind earlier speech, so it needs longer buckets (eth_audio.py,
+# which runs on the display unit, keeps a copy)
+ALERT_LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.15, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0)
+
+
+class Histogram:
+    """Fixed buckets allocated up front. observe() is a bisect and three increments, with no lock:
+    each histogram has a single writer thread, and a scrape that races it is at most one sample off."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(le, count of samples <= le) pairs, ending with +Inf."""
+        total = 0
+        pairs = []
+        for le, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            pairs.append((le, total))
+        return pairs
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (0 when empty)."""
+        if not self.count:
+            return 0.0
+        for le, total in self.cumulative():
+            if total >= q * self.count:
+                return le
+        return float("inf")
+
+
+def _labels(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Metric families read at scrape time.
+
+    Each family has a collect() callback returning (labels, value) pairs, or (labels, Histogram) for
+    histograms, so most values are read straight from counters the detector already keeps.
+    """
+
+    def __init__(self):
+        self.families = []
+
+    def counter(self, name, help, collect):
+        self.families.append((name, "counter", help, collect))
+
+    def gauge(self, name, help, collect):
+        self.families.append((name, "gauge", help, collect))
+
+    def histogram(self, name, help, collect):
+        self.families.append((name, "histogram", help, collect))
+
+    def render(self):
+        lines = []
+        for name, kind, help, collect in self.families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collect():
+                if kind == "histogram":
+                    for le, total in value.cumulative():
+                        lines.append(f"{name}_bucket{_labels(labels, {'le': _number(le)})} {total}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value.sum)}")
+                    lines.append(f"{name}_count{_labels(labels)} {value.count}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves a Registry on /metrics from a daemon thread."""
+
+    def __init__(self, registry, host=METRICS_HOST, port=METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.server = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"Metrics endpoint disabled, could not bind {self.host}:{self.port}: {e}")
+            return False
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"Metrics on http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
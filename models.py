@@ -0,0 +1,181 @@
+# Detector models behind one interface, so the frame loop does not care which network runs.
+# Every model ships its own label map (labels/*.txt, one label per line, index = class id); labels
+# shared with the VOC set use the VOC spelling ("motorbike", "tvmonitor", ...) so the class lists in
+# detector.py work with any model.
+#
+#   mobilenet_ssd           the original MobileNetSSD, Caffe, through OpenCV DNN (tuned by dnn_tuning)
+#   ssd_mobilenet_v1        ONNX model zoo SSD-MobileNetV1 (COCO, includes truck), through ONNX Runtime
+#   ssd_mobilenet_v1_int8   the same model quantized to INT8, through ONNX Runtime
+import os
+import time
+
+import cv2
+import numpy as np
+
+import dnn_tuning
+
+DEFAULT_MODEL = "mobilenet_ssd"
+MODELS = {
+    "mobilenet_ssd": {
+        "type": "caffe",
+        "prototxt": "MobileNetSSD_deploy.prototxt.txt",
+        "weights": "MobileNetSSD_deploy.caffemodel",
+        "labels": "labels/voc.txt",
+    },
+    "ssd_mobilenet_v1": {
+        "type": "onnx",
+        "weights": "ssd_mobilenet_v1_12.onnx",
+        "labels": "labels/coco.txt",
+    },
+    "ssd_mobilenet_v1_int8": {
+        "type": "onnx",
+        "weights": "ssd_mobilenet_v1_12-int8.onnx",
+        "labels": "labels/coco.txt",
+    },
+}
+WARMUP_RUNS = 3
+
+
+def load_labels(path):
+    with open(path) as f:
+        return [line.strip() for line in f]
+
+
+class Detector:
+    """SSD-style detector: preprocess() BGR images into the network input, infer() that input into
+    rows [image index, class id, confidence, x1, y1, x2, y2] with coordinates relative to the input.
+
+    Both use buffers reused between calls, so one batch must be inferred before the next is prepared.
+    A batch runs at the size of its first image: size is what the model was trained at, and the SSD
+    heads also work at smaller inputs, faster but with less reach (qos.py steps down to those).
+    """
+
+    def __init__(self, name, spec, size=(300, 300)):
+        self.name = name
+        self.size = size
+        self.labels = load_labels(spec["labels"])
+
+    def preprocess(self, images):
+        raise NotImplementedError
+
+    def infer(self, inputs):
+        raise NotImplementedError
+
+    def detect(self, images):
+        return self.infer(self.preprocess(images))
+
+    def tune(self):
+        """Pick the fastest runtime settings for this host (see CaffeSSD); a no-op where there are none."""
+
+    def warm_up(self, batch=1, runs=WARMUP_RUNS):
+        """Run a few inferences at the batch size the detector will use, so the first real frame is not slow."""
+        image = np.random.default_rng(0).integers(0, 255, (self.size[1], self.size[0], 3), dtype=np.uint8)
+        inputs = self.preprocess([image] * batch)
+        start = time.perf_counter()
+        for _ in range(runs):
+            self.infer(inputs)
+        print(f"{self.name} warm-up: {runs} x batch {batch} in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+class CaffeSSD(Detector):
+    """MobileNetSSD through OpenCV DNN, with the backend dnn_tuning picked for this host."""
+
+    def __init__(self, name, spec, size=(300, 300), scale=0.007843, mean=127.5):
+        super().__init__(name, spec, size)
+        self.scale = scale
+        self.mean = mean
+        self.blobs = {}  # (batch size, width, height) -> reused (N, 3, H, W) input blob
+        self.staging = {}  # (width, height) -> reused (H, W, 3) float image
+        self.weights = spec["weights"]
+        self.net = cv2.dnn.readNetFromCaffe(spec["prototxt"], spec["weights"])
+
+    def tune(self):
+        """Apply dnn_tuning's backend for this host; on the first start that benchmarks the candidates."""
+        dnn_tuning.tune(self.net, self.weights)
+
+    def preprocess(self, images):
+        """cv2.dnn.blobFromImages(images, scale, size, (mean, mean, mean)) written into a reused blob.
+
+        The mean is subtracted from all three channels, as MobileNetSSD was trained. (The old call passed
+        a bare 127.5, which OpenCV reads as (127.5, 0, 0) and so left green and red uncentred.)
+        """
+        size = images[0].shape[1::-1]
+        blob = self.blobs.get((len(images), *size))
+        if blob is None:
+            blob = self.blobs[(len(images), *size)] = np.empty((len(images), 3, size[1], size[0]), dtype=np.float32)
+        staging = self.staging.get(size)
+        if staging is None:
+            staging = self.staging[size] = np.empty((size[1], size[0], 3), dtype=np.float32)
+        for i, image in enumerate(images):
+            if image.shape[1::-1] != size:
+                image = cv2.resize(image, size)
+            # Scale in HWC order in a float staging buffer, then one strided copy into CHW
+            cv2.subtract(image, (self.mean, self.mean, self.mean, 0), dst=staging, dtype=cv2.CV_32F)
+            np.multiply(staging, self.scale, out=staging)
+            np.copyto(blob[i], staging.transpose(2, 0, 1))
+        return blob
+
+    def infer(self, blob):
+        self.net.setInput(blob)
+        return self.net.forward()[0, 0]
+
+
+class OnnxSSD(Detector):
+    """TensorFlow-exported SSD in ONNX (model zoo ssd_mobilenet_v1_12 and its INT8 variant) on the CPU.
+
+    The model takes NHWC uint8 RGB and returns detection_boxes (ymin, xmin, ymax, xmax), detection_classes,
+    detection_scores and num_detections, which infer() turns into the Caffe SSD's row layout.
+    """
+
+    def __init__(self, name, spec, size=(300, 300), threads=None):
+        super().__init__(name, spec, size)
+        import onnxruntime  # Only needed for the ONNX models
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(spec["weights"], options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        # Matched without the ":0" suffix tf2onnx exports give tensor names
+        outputs = [output.name for output in self.session.get_outputs()]
+        self.output_names = []
+        for wanted in ("detection_boxes", "detection_classes", "detection_scores", "num_detections"):
+            found = [name for name in outputs if name.split(":")[0] == wanted]
+            if not found:
+                raise ValueError(f"{spec['weights']} has no {wanted} output (outputs: {', '.join(outputs)})")
+            self.output_names.append(found[0])
+        self.batches = {}  # (batch size, width, height) -> reused (N, H, W, 3) uint8 input
+
+    def preprocess(self, images):
+        size = images[0].shape[1::-1]
+        batch = self.batches.get((len(images), *size))
+        if batch is None:
+            batch = self.batches[(len(images), *size)] = np.empty((len(images), size[1], size[0], 3), dtype=np.uint8)
+        for i, image in enumerate(images):
+            if image.shape[1::-1] != size:
+                image = cv2.resize(image, size)
+            cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=batch[i])
+        return batch
+
+    def infer(self, batch):
+        boxes, classes, scores, counts = self.session.run(self.output_names, {self.input_name: batch})
+        rows = []
+        for i, count in enumerate(counts.astype(int)):
+            image_rows = np.empty((count, 7), dtype=np.float32)
+            image_rows[:, 0] = i
+            image_rows[:, 1] = classes[i, :count]
+            image_rows[:, 2] = scores[i, :count]
+            image_rows[:, 3:7] = boxes[i, :count][:, [1, 0, 3, 2]]
+            rows.append(image_rows)
+        return np.concatenate(rows)
+
+
+def load(name=DEFAULT_MODEL, tune=True):
+    """The detector registered in MODELS under name. With tune=False the caller runs tune() itself,
+    e.g. once nothing else competes for the CPU."""
+    if name not in MODELS:
+        raise SystemExit(f"Unknown model {name!r}, expected one of {', '.join(sorted(MODELS))}")
+    spec = MODELS[name]
+    model = {"caffe": CaffeSSD, "onnx": OnnxSSD}[spec["type"]](name, spec)
+    if tune:
+        model.tune()
+    return model
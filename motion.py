@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+
+# Frames are compared at this size (width, height); enough to see a person walk in at 500x280
+MOTION_SIZE = (80, 45)
+# Per-pixel grey-level change that counts as changed, and the fraction of changed pixels that counts as motion
+MOTION_THRESHOLD = 25
+MOTION_MIN_AREA = 0.002
+# Run the network at least this often even if nothing moved (seconds)
+MOTION_HEARTBEAT = 5.0
+
+
+class MotionGate:
+    """Downscaled frame differencing in front of the network.
+
+    check() compares the frame with the one the network last ran on and returns whether the network
+    should run. It gives no changed-region hints: the gate is only consulted while nothing is tracked,
+    and the network then has to look at the whole ROI anyway, since an object that has not moved since
+    the last heartbeat is not in any changed region.
+    """
+
+    def __init__(self, size=MOTION_SIZE, threshold=MOTION_THRESHOLD, min_area=MOTION_MIN_AREA,
+                 heartbeat=MOTION_HEARTBEAT):
+        self.size = size
+        self.threshold = threshold
+        self.min_area = min_area
+        self.heartbeat = heartbeat
+        self.reference = None
+        # Reused buffers: the downscaled frame, its grey version, and two blurred frames that take
+        # turns being the reference
+        self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        self.gray = np.empty((size[1], size[0]), dtype=np.uint8)
+        self.blurred = [np.empty((size[1], size[0]), dtype=np.uint8) for _ in range(2)]
+        self.diff = np.empty((size[1], size[0]), dtype=np.uint8)
+        self.last_pass = float("-inf")
+        self.checked = 0
+        self.skipped = 0
+
+    def check(self, frame, now):
+        self.checked += 1
+        cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        gray = self.blurred[1] if self.blurred[0] is self.reference else self.blurred[0]
+        cv2.GaussianBlur(self.gray, (3, 3), 0, dst=gray)
+
+        moved = self.reference is None
+        if not moved:
+            changed = cv2.absdiff(gray, self.reference, dst=self.diff) > self.threshold
+            moved = changed.mean() >= self.min_area
+
+        if moved or now - self.last_pass >= self.heartbeat:
+            self.reference = gray
+            self.last_pass = now
+            return True
+        self.skipped += 1
+        return False
+
+    def hit_rate(self):
+        """Fraction of checked frames on which the network was skipped."""
+        return self.skipped / self.checked if self.checked else 0.0
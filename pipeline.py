@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import deque
+
+from metrics import Histogram
+
+# How often the pipeline prints per-stage throughput (seconds)
+STATS_INTERVAL = 5.0
+# Frame buffers kept for reuse per camera: enough for every stage and queue plus the one being captured
+FRAME_POOL_SIZE = 8
+
+
+class LatestQueue:
+    """Bounded queue between two stages. When full, the oldest item is dropped (latest frame wins)."""
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+        self.on_drop = on_drop
+
+    def put(self, item):
+        dropped = None
+        with self.cond:
+            if len(self.items) >= self.maxsize:
+                dropped = self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+        if dropped is not None and self.on_drop:
+            self.on_drop(dropped)
+
+    def get(self, timeout=None):
+        """Return the next item, or None once the queue is closed and empty (or on timeout)."""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class FramePool:
+    """Frame buffers handed back by the pipeline once a packet is finished or dropped.
+
+    acquire() returns a free buffer, or None when every buffer is in flight (the source then allocates
+    a new frame, which joins the pool when it comes back). deque append/pop are atomic, so no lock.
+    """
+
+    def __init__(self, size=FRAME_POOL_SIZE):
+        self.size = size
+        self.free = deque()
+        self.misses = 0
+
+    def acquire(self):
+        try:
+            return self.free.pop()
+        except IndexError:
+            self.misses += 1
+            return None
+
+    def release(self, buffer):
+        if buffer is not None and len(self.free) < self.size:
+            self.free.append(buffer)
+
+
+class FramePacket:
+    """A captured frame and everything the later stages attach to it."""
+    __slots__ = ("index", "frame", "captured_at", "detections", "alert", "payload", "compressed")
+
+    def __init__(self, index, frame, captured_at):
+        self.index = index
+        self.frame = frame
+        self.captured_at = captured_at
+        self.detections = []
+        self.alert = False
+        self.payload = None
+        self.compressed = None  # The source's JPEG for this frame, when it delivers one
+
+
+class Stage(threading.Thread):
+    """One pipeline worker. A source stage has no inbox and calls func() until it returns None;
+    every other stage calls func(item) for each item taken from its inbox. An exception in func is
+    passed to on_error(stage, exception) and ends the stage."""
+
+    def __init__(self, name, func, inbox=None, outbox=None, release=None, on_error=None):
+        super().__init__(name=name, daemon=True)
+        self.func = func
+        self.inbox = inbox
+        self.outbox = outbox
+        self.release = release
+        self.on_error = on_error
+        self.stop_event = threading.Event()
+        self.processed = 0
+        self.busy = 0.0
+        self.latency = Histogram()
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.inbox is None:
+                    item = None
+                else:
+                    item = self.inbox.get(timeout=0.5)
+                    if item is None:
+                        if self.inbox.closed:
+                            break
+                        continue
+
+                start = time.perf_counter()
+                result = self.func() if self.inbox is None else self.func(item)
+                elapsed = time.perf_counter() - start
+                self.busy += elapsed
+                self.latency.observe(elapsed)
+
+                if self.inbox is None and result is None:
+                    break  # Source is exhausted
+                self.processed += 1
+                if result is not None and self.outbox is not None:
+                    self.outbox.put(result)
+                elif item is not None and self.release:
+                    self.release(item)  # The packet stops here (last stage, or filtered out)
+        except Exception as e:
+            print(f"Stage {self.name} error: {e}")
+            if self.on_error:
+                self.on_error(self, e)
+        finally:
+            if self.outbox is not None:
+                self.outbox.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class Pipeline:
+    """Chains stages with LatestQueues and reports per-stage throughput.
+
+    release(item) is called for every item that leaves the pipeline, finished or dropped, so its
+    buffers can be reused. An error in any stage stops the whole pipeline: the others would otherwise
+    keep capturing frames nothing detects on. error then says which stage failed.
+    """
+
+    def __init__(self, steps, queue_size=1, name="pipeline", release=None):
+        self.name = name
+        # steps is an ordered list of (name, func); the first one is the source
+        self.queues = [LatestQueue(queue_size, release) for _ in range(len(steps) - 1)]
+        self.stages = []
+        for i, (name, func) in enumerate(steps):
+            inbox = self.queues[i - 1] if i > 0 else None
+            outbox = self.queues[i] if i < len(self.queues) else None
+            self.stages.append(Stage(name, func, inbox, outbox, release, self.fail))
+        self.started_at = None
+        self.error = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        for stage in self.stages:
+            stage.start()
+
+    def stop(self):
+        for stage in self.stages:
+            stage.stop()
+        for q in self.queues:
+            q.close()
+
+    def fail(self, stage, error):
+        if self.error is None:
+            self.error = f"stage {stage.name} failed: {error}"
+        self.stop()
+
+    def join(self, timeout=None):
+        for stage in self.stages:
+            stage.join(timeout)
+
+    def is_alive(self):
+        return self.error is None and any(stage.is_alive() for stage in self.stages)
+
+    def stats(self):
+        """Per-stage throughput. 'capacity' is the FPS a stage could sustain on its own."""
+        elapsed = max(time.perf_counter() - self.started_at, 1e-9)
+        stats = []
+        for i, stage in enumerate(self.stages):
+            stats.append({
+                "stage": stage.name,
+                "fps": stage.processed / elapsed,
+                "capacity": stage.processed / stage.busy if stage.busy > 0 else 0.0,
+                "busy": stage.busy / elapsed,
+                "dropped": self.queues[i - 1].dropped if i > 0 else 0,
+            })
+        return stats
+
+    def report(self):
+        stats = self.stats()
+        parts = [f"{s['stage']} {s['fps']:.1f} fps (busy {s['busy'] * 100:.0f}%, dropped {s['dropped']})"
+                 for s in stats]
+        measured = [s for s in stats if s["capacity"] > 0]
+        if measured:
+            slowest = min(measured, key=lambda s: s["capacity"])
+            parts.append(f"bottleneck: {slowest['stage']} ({slowest['capacity']:.1f} fps max)")
+        print(f"[{self.name}] " + " | ".join(parts))
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def class_mask(classes, names):
+    """Boolean lookup indexed by class id: True where classes[id] is in names."""
+    return np.array([label in names for label in classes], dtype=bool)
+
+
+class Detections:
+    """Rows of one frame that passed the confidence and class filters, as parallel arrays."""
+    __slots__ = ("class_ids", "confidences", "boxes", "meters", "in_range")
+
+    def __init__(self, class_ids, confidences, boxes, meters, in_range):
+        self.class_ids = class_ids
+        self.confidences = confidences
+        self.boxes = boxes
+        self.meters = meters
+        self.in_range = in_range
+
+    def __len__(self):
+        return len(self.class_ids)
+
+
+def postprocess(detections, scale, keep, alert, lut, min_confidence=0.8, alert_range=(0.1, 5.0)):
+    """Vectorized version of the per-row detection loop over detections[0, 0].
+
+    scale is the reusable np.array([w, h, w, h]) for the frame size, keep and alert are class-id
+    lookups from class_mask(), lut is calibration.distance_lut(). Distances are in metres; in_range
+    marks rows that should alert.
+    """
+    rows = detections[0, 0]
+    rows = rows[rows[:, 2] > min_confidence]
+    class_ids = rows[:, 1].astype(np.intp)
+    # Ids outside the label map (padding rows, or a label file that does not match the model) are dropped
+    valid = (class_ids >= 0) & (class_ids < len(keep))
+    rows, class_ids = rows[valid], class_ids[valid]
+    mask = keep[class_ids]
+    rows = rows[mask]
+    class_ids = class_ids[mask]
+
+    boxes = (rows[:, 3:7] * scale).astype(int)
+    return measure(class_ids, rows[:, 2], boxes, alert, lut, alert_range)
+
+
+def measure(class_ids, confidences, boxes, alert, lut, alert_range=(0.1, 5.0)):
+    """Distances and the alert predicate for pixel boxes, e.g. boxes predicted by the tracker."""
+    # Width 0 (and negative widths of degenerate predicted boxes) map to inf, i.e. never in range
+    widths = np.clip(boxes[:, 2] - boxes[:, 0], 0, lut.shape[1] - 1)
+    meters = lut[class_ids, widths]
+    in_range = (meters > alert_range[0]) & (meters < alert_range[1]) & alert[class_ids]
+    return Detections(class_ids, confidences, boxes, meters, in_range)
@@ -0,0 +1,152 @@
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+# Frame latency (capture -> written to the stream, p95 over an interval) the controller keeps under (seconds)
+QOS_LATENCY_BUDGET = 0.25
+# System CPU use (0-1) above which the controller steps down, and below which it may step back up
+QOS_CPU_HIGH = 0.90
+QOS_CPU_LOW = 0.70
+# Step back up only after this many intervals under QOS_RECOVER_MARGIN of the budget and QOS_CPU_LOW
+QOS_RECOVER_AFTER = 3
+QOS_RECOVER_MARGIN = 0.6
+# Seconds between decisions
+QOS_INTERVAL = 2.0
+
+# One step per level, cheapest loss first. cadence multiplies the frames between network runs,
+# input_size is the network input, stream_quality the JPEG quality of encoded stream frames and
+# log_every keeps every Nth inferred frame's detection rows (alert rows are always logged).
+QOS_LEVELS = [
+    {"cadence": 1.0, "input_size": (300, 300), "stream_quality": 95, "log_every": 1},
+    {"cadence": 1.0, "input_size": (300, 300), "stream_quality": 70, "log_every": 1},
+    {"cadence": 1.0, "input_size": (300, 300), "stream_quality": 70, "log_every": 5},
+    {"cadence": 1.5, "input_size": (300, 300), "stream_quality": 60, "log_every": 5},
+    {"cadence": 1.5, "input_size": (256, 256), "stream_quality": 60, "log_every": 10},
+    {"cadence": 2.0, "input_size": (256, 256), "stream_quality": 50, "log_every": 10},
+    {"cadence": 2.0, "input_size": (224, 224), "stream_quality": 50, "log_every": 20},
+    {"cadence": 3.0, "input_size": (224, 224), "stream_quality": 40, "log_every": 20},
+]
+# Knobs that decide how fast a new object is detected: while an alert is possible they stay at level 0
+DETECTION_KNOBS = ("cadence", "input_size")
+
+
+def applicable_levels(levels, ignore=()):
+    """levels without the steps that only change knobs in ignore (stream_quality when no stream encodes
+    JPEGs): such a step would cost an interval and relieve nothing."""
+    kept = [levels[0]]
+    for level in levels[1:]:
+        if any(value != kept[-1][knob] for knob, value in level.items() if knob not in ignore):
+            kept.append(level)
+    return kept
+
+
+class CpuMeter:
+    """System-wide CPU use between calls, from /proc/stat (load average per core where that is missing)."""
+
+    def __init__(self):
+        self.last = self.read()
+
+    @staticmethod
+    def read():
+        try:
+            with open("/proc/stat") as f:
+                fields = [int(v) for v in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields), idle
+
+    def busy(self):
+        now = self.read()
+        if now is None or self.last is None:
+            return os.getloadavg()[0] / (os.cpu_count() or 1)
+        (total, idle), (last_total, last_idle) = now, self.last
+        self.last = now
+        return 1.0 - (idle - last_idle) / max(total - last_total, 1)
+
+
+class QosController:
+    """Steps the detector's quality knobs down when frames fall behind the latency budget or the CPU
+    is saturated, and back up once there is headroom again.
+
+    The pipeline threads call sample() with each frame's latency; update() runs every QOS_INTERVAL from
+    the engine's main loop and returns the settings to apply when they changed. Alerting is never
+    traded away: with alerting set (an alertable object is near), the detection knobs are held at
+    level 0, and the stream and logging knobs go one level further down for every step of detection
+    cut that is undone (none at levels that have not touched detection yet).
+    """
+
+    def __init__(self, budget=QOS_LATENCY_BUDGET, levels=QOS_LEVELS, interval=QOS_INTERVAL):
+        self.budget = budget
+        self.levels = levels
+        self.interval = interval
+        self.level = 0
+        self.healthy = 0
+        self.samples = deque(maxlen=4096)  # Appended by the pipeline threads, drained by update()
+        self.cpu = CpuMeter()
+        self.settings = self.target(alerting=False)
+        self.last_update = time.monotonic()
+        self.adjustments = 0
+
+    def sample(self, latency):
+        self.samples.append(latency)
+
+    def latency(self):
+        """p95 of the frame latencies since the last call (None without frames)."""
+        samples = [self.samples.popleft() for _ in range(len(self.samples))]
+        return float(np.percentile(samples, 95)) if samples else None
+
+    def target(self, alerting):
+        settings = dict(self.levels[self.level])
+        if alerting:
+            undone = sum(1 for i in range(1, self.level + 1)
+                         if any(self.levels[i][knob] != self.levels[i - 1][knob] for knob in DETECTION_KNOBS))
+            if undone:
+                lower = self.levels[min(self.level + undone, len(self.levels) - 1)]
+                settings.update({knob: value for knob, value in lower.items() if knob not in DETECTION_KNOBS})
+            settings.update({knob: self.levels[0][knob] for knob in DETECTION_KNOBS})
+        return settings
+
+    def step(self, latency, cpu):
+        """Move one level for the last interval's p95 latency and CPU use; returns why, or None."""
+        if (latency is not None and latency > self.budget) or cpu > QOS_CPU_HIGH:
+            self.healthy = 0
+            if self.level < len(self.levels) - 1:
+                self.level += 1
+                return "over budget"
+        elif (latency is None or latency < self.budget * QOS_RECOVER_MARGIN) and cpu < QOS_CPU_LOW:
+            self.healthy += 1
+            if self.level and self.healthy >= QOS_RECOVER_AFTER:
+                self.level -= 1
+                self.healthy = 0
+                return "headroom"
+        else:
+            self.healthy = 0
+        return None
+
+    def update(self, alerting=False, now=None):
+        """Called from the engine's loop: picks a level every interval, and follows alerting on every call
+        so an object coming near gets full-rate detection at once. Returns the new settings, or None if
+        nothing changed."""
+        now = time.monotonic() if now is None else now
+        reason = measured = None
+        if now - self.last_update >= self.interval:
+            self.last_update = now
+            latency, cpu = self.latency(), self.cpu.busy()
+            reason = self.step(latency, cpu)
+            shown = f"{latency * 1000:.0f} ms" if latency is not None else "no frames"
+            measured = f"p95 latency {shown} vs {self.budget * 1000:.0f} ms budget, CPU {cpu * 100:.0f}%"
+
+        settings = self.target(alerting)
+        if settings == self.settings and not reason:
+            return None
+        self.adjustments += 1
+        why = reason or ("alert possible, detection held at full rate" if alerting else "alert cleared")
+        changes = ", ".join(f"{knob} {self.settings[knob]} -> {value}"
+                            for knob, value in settings.items() if self.settings[knob] != value)
+        changes = changes or "no change while an alert is possible"
+        print(f"[qos] level {self.level} ({why}{': ' + measured if measured else ''}): {changes}")
+        self.settings = settings
+        return settings
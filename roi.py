@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """The part of a camera's frame the network looks at.
+
+    spec is None (whole frame), a rectangle (x1, y1, x2, y2) or a polygon [(x, y), ...] in full-frame
+    pixels. The network gets the bounding rectangle resized to its input size, with pixels outside a
+    polygon set to the mean grey (127, which the blob's mean subtraction turns into 0). scale and offset
+    map the network's relative boxes back to full-frame pixels.
+    """
+
+    def __init__(self, spec, width, height, size=(300, 300)):
+        self.size = size
+        self.polygon = None
+        if spec is None:
+            x1, y1, x2, y2 = 0, 0, width, height
+        elif len(spec) == 4 and all(np.isscalar(v) for v in spec):
+            x1, y1, x2, y2 = spec
+        else:
+            self.polygon = np.array(spec, dtype=np.int32).reshape(-1, 2)
+            x, y, w, h = cv2.boundingRect(self.polygon)
+            x1, y1, x2, y2 = x, y, x + w, y + h
+        x1, x2 = int(np.clip(x1, 0, width - 1)), int(np.clip(x2, 1, width))
+        y1, y2 = int(np.clip(y1, 0, height - 1)), int(np.clip(y2, 1, height))
+        self.rect = (x1, y1, x2, y2)
+        self.full = self.rect == (0, 0, width, height) and self.polygon is None
+        self.scale = np.array([x2 - x1, y2 - y1, x2 - x1, y2 - y1], dtype=np.float32)
+        self.offset = np.array([x1, y1, x1, y1], dtype=int)
+
+        self.input = np.empty((size[1], size[0], 3), dtype=np.uint8)  # Reused by network_input()
+        self.outside = None
+        if self.polygon is not None:
+            # Polygon in network-input coordinates, rasterised once
+            points = (self.polygon - [x1, y1]) * [size[0] / (x2 - x1), size[1] / (y2 - y1)]
+            inside = np.zeros((size[1], size[0]), dtype=np.uint8)
+            cv2.fillPoly(inside, [np.round(points).astype(np.int32)], 1)
+            self.outside = inside == 0
+
+    def crop(self, frame):
+        """The ROI of frame without copying (a view)."""
+        x1, y1, x2, y2 = self.rect
+        return frame[y1:y2, x1:x2]
+
+    def network_input(self, frame):
+        """The ROI resized into a reused buffer: valid until the next call (infer() is synchronous)."""
+        image = cv2.resize(self.crop(frame), self.size, dst=self.input)
+        if self.outside is not None:
+            image[self.outside] = 127
+        return image
+
+    def to_frame(self, boxes):
+        """Boxes in ROI pixels (postprocess() with scale=self.scale) to full-frame pixels, in place."""
+        boxes += self.offset
+        return boxes
+
+    def draw(self, frame, color=(255, 255, 0)):
+        if self.full:
+            return
+        if self.polygon is not None:
+            cv2.polylines(frame, [self.polygon], True, color, 1)
+        else:
+            x1, y1, x2, y2 = self.rect
+            cv2.rectangle(frame, (x1, y1), (x2 - 1, y2 - 1), color, 1)
@@ -0,0 +1,61 @@
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+SNAPSHOT_WORKERS = 2
+
+
+class SnapshotWriter:
+    """Saves alert screenshots off the detector loop.
+
+    The caller only pays for a frame copy; a worker JPEG-encodes the frame once and reuses the
+    bytes for the screenshot file and the base64 column of image_log.csv (the upload payload).
+    """
+
+    def __init__(self, folder, log_writer, workers=SNAPSHOT_WORKERS):
+        self.folder = folder
+        self.log_writer = log_writer
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot")
+        self.alerts = 0
+        self.stall_total = 0.0
+        self.stall_max = 0.0
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+
+    def submit(self, frame, prefix, row, extra=()):
+        """Queue a snapshot of frame; row is the image_log.csv row before timestamp and image, extra the
+        columns after them."""
+        start = time.perf_counter()
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        self.pool.submit(self.save, frame.copy(), prefix, row, timestamp, list(extra))
+        stall = time.perf_counter() - start
+        self.alerts += 1
+        self.stall_total += stall
+        self.stall_max = max(self.stall_max, stall)
+
+    def save(self, frame, prefix, row, timestamp, extra):
+        try:
+            ok, buffer = cv2.imencode('.jpg', frame)
+            if not ok:
+                print("Screenshot encode failed")
+                return
+            jpeg = buffer.tobytes()
+            screenshot_filename = os.path.join(self.folder, f"{prefix}_{timestamp}.jpg")
+            with open(screenshot_filename, 'wb') as f:
+                f.write(jpeg)
+            self.log_writer.write("images", row + [timestamp, base64.b64encode(jpeg).decode('utf-8')] + extra)
+            print(f"Screenshot saved: {screenshot_filename}")
+        except Exception as e:
+            print(f"Screenshot error: {e}")
+
+    def report(self):
+        if not self.alerts:
+            return
+        print(f"[snapshot] {self.alerts} alerts | detector stall avg "
+              f"{self.stall_total / self.alerts * 1000:.2f} ms, max {self.stall_max * 1000:.2f} ms")
+
+    def close(self):
+        self.pool.shutdown(wait=True)
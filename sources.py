@@ -0,0 +1,247 @@
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class _Pacer:
+    """Sleeps so frames come out at fps; fps of 0 or None means as fast as possible."""
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else 0.0
+        self.next_at = None
+
+    def wait(self):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        if self.next_at is None or now - self.next_at > self.interval:
+            self.next_at = now  # First frame, or we fell behind: do not try to catch up
+        elif self.next_at > now:
+            time.sleep(self.next_at - now)
+        self.next_at += self.interval
+
+
+# Every source has read(out=None): out is an optional frame buffer to decode into (see pipeline.FramePool).
+# Sources that cannot reuse it, or get a buffer of the wrong size, return a new array instead.
+
+
+class V4L2Source:
+    """Live camera through cv2.VideoCapture.
+
+    With mjpeg=True the camera is asked for MJPEG and the JPEG it sent is kept in .compressed after
+    each read, so a passthrough stream can forward it without re-encoding.
+    """
+    live = True
+
+    def __init__(self, device, width, height, mjpeg=False):
+        self.device = device
+        self.width = width
+        self.height = height
+        self.mjpeg = mjpeg
+        self.cap = None
+        self.compressed = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.device)
+        if self.mjpeg:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)  # Hand back the JPEG bytes instead of decoding
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        return self.cap.isOpened()
+
+    def read(self, out=None):
+        ret, frame = self.cap.read(None if self.mjpeg else out)
+        if not ret:
+            return None
+        if self.mjpeg and frame.ndim < 3:
+            # One row of JPEG bytes: decode a copy for the detector, keep the bytes for the stream
+            self.compressed = frame.tobytes()
+            frame = cv2.imdecode(frame, cv2.IMREAD_COLOR)
+        return frame
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+
+    def __str__(self):
+        return f"camera {self.device}"
+
+
+class VideoFileSource:
+    """Recorded clip resized to the frame size, paced at the clip's frame rate (realtime) or as fast as
+    it decodes."""
+    live = False
+    compressed = None
+
+    def __init__(self, path, width, height, realtime=True, loop=False):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.native = False  # The clip is already at the frame size: decode straight into out
+        self.realtime = realtime
+        self.loop = loop
+        self.cap = None
+        self.pacer = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.realtime else 0
+        self.pacer = _Pacer(fps or (15 if self.realtime else 0))
+        self.native = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                       int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))) == (self.width, self.height)
+        return self.cap.isOpened()
+
+    def read(self, out=None):
+        target = out if self.native else None
+        ret, frame = self.cap.read(target)
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read(target)
+        if not ret:
+            return None
+        if frame.shape[1::-1] != (self.width, self.height):
+            if out is not None and out.shape == (self.height, self.width, 3):
+                frame = cv2.resize(frame, (self.width, self.height), dst=out)
+            else:
+                frame = cv2.resize(frame, (self.width, self.height))
+        self.pacer.wait()
+        return frame
+
+    def release(self):
+        if self.cap:
+            self.cap.release()
+
+    def __str__(self):
+        return f"video {self.path}"
+
+
+class ImageDirSource:
+    """Images from a folder in name order, resized to the frame size and optionally paced at fps.
+    Files that cannot be decoded are skipped."""
+    live = False
+    compressed = None
+
+    def __init__(self, path, width, height, fps=0, loop=False):
+        self.path = path
+        self.width = width
+        self.height = height
+        self.loop = loop
+        self.pacer = _Pacer(fps)
+        self.paths = []
+        self.position = 0
+
+    def open(self):
+        self.paths = sorted(p for p in glob.glob(os.path.join(self.path, "*"))
+                            if p.lower().endswith(IMAGE_EXTENSIONS))
+        return bool(self.paths)
+
+    def read(self, out=None):
+        frame = None
+        for _ in range(len(self.paths)):  # At most one pass over the folder looking for a readable file
+            if self.position >= len(self.paths):
+                if not self.loop:
+                    return None
+                self.position = 0
+            path = self.paths[self.position]
+            self.position += 1
+            frame = cv2.imread(path)
+            if frame is not None:
+                break
+            print(f"Skipping unreadable image {path}")
+        if frame is None:
+            return None
+        if frame.shape[1::-1] != (self.width, self.height):
+            if out is not None and out.shape == (self.height, self.width, 3):
+                frame = cv2.resize(frame, (self.width, self.height), dst=out)
+            else:
+                frame = cv2.resize(frame, (self.width, self.height))
+        self.pacer.wait()
+        return frame
+
+    def release(self):
+        pass
+
+    def __str__(self):
+        return f"images {self.path}"
+
+
+class SyntheticSource:
+    """Generated frames: a noisy background with a box moving across it. Needs no hardware or files."""
+    live = False
+    compressed = None
+
+    def __init__(self, width, height, fps=0, frames=0, seed=0):
+        self.width = width
+        self.height = height
+        self.pacer = _Pacer(fps)
+        self.frames = frames
+        self.rng = np.random.default_rng(seed)
+        self.background = None
+        self.count = 0
+
+    def open(self):
+        self.background = self.rng.integers(0, 80, (self.height, self.width, 3), dtype=np.uint8)
+        return True
+
+    def read(self, out=None):
+        if self.frames and self.count >= self.frames:
+            return None
+        if out is not None and out.shape == self.background.shape:
+            frame = out
+            np.copyto(frame, self.background)
+        else:
+            frame = self.background.copy()
+        box_w, box_h = self.width // 6, self.height // 2
+        x = (self.count * 4) % (self.width - box_w)
+        y = self.height // 4
+        cv2.rectangle(frame, (x, y), (x + box_w, y + box_h), (200, 180, 160), -1)
+        self.count += 1
+        self.pacer.wait()
+        return frame
+
+    def release(self):
+        pass
+
+    def __str__(self):
+        return "synthetic"
+
+
+def open_source(config, width, height, mjpeg=False):
+    """Build the frame source described by a camera's "source" entry (default: its V4L2 device).
+
+    {"type": "v4l2", "device": "/dev/video2", "mjpeg": False}  device defaults to the camera's "device"
+    {"type": "video", "path": "clip.mp4", "realtime": True, "loop": False}
+    {"type": "images", "path": "frames/", "fps": 15, "loop": False}
+    {"type": "synthetic", "fps": 0, "frames": 0}            fps/frames of 0 mean unpaced/endless
+
+    mjpeg asks a V4L2 camera for its JPEG bytes as well (for the passthrough stream mode).
+    """
+    spec = config.get("source") or {"type": "v4l2"}
+    kind = spec.get("type", "v4l2")
+    if kind == "v4l2":
+        return V4L2Source(spec.get("device", config.get("device")), width, height, spec.get("mjpeg", mjpeg))
+    if kind == "video":
+        return VideoFileSource(spec["path"], width, height, spec.get("realtime", True), spec.get("loop", False))
+    if kind == "images":
+        return ImageDirSource(spec["path"], width, height, spec.get("fps", 0), spec.get("loop", False))
+    if kind == "synthetic":
+        return SyntheticSource(width, height, spec.get("fps", 0), spec.get("frames", 0), spec.get("seed", 0))
+    raise ValueError(f"Unknown frame source type: {kind}")
+
+
+def parse_source(text):
+    """Turn a command-line value like "synthetic", "video:clip.mp4", "images:frames/" or "v4l2:/dev/video2"
+    into a source entry."""
+    kind, _, path = text.partition(":")
+    spec = {"type": kind}
+    if path:
+        spec["device" if kind == "v4l2" else "path"] = path
+    if kind == "video":
+        spec["realtime"] = False
+    return spec
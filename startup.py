@@ -0,0 +1,72 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Written at the end of startup and updated when the first detection happens
+STARTUP_PROFILE = "startup_profile.json"
+
+
+def since_boot():
+    """Seconds since the machine booted (CLOCK_BOOTTIME), or None where that clock does not exist."""
+    try:
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    except (AttributeError, OSError):
+        return None
+
+
+class StartupProfile:
+    """Timeline of the startup phases, relative to when the process began importing its modules."""
+
+    def __init__(self, started_at, imported_at):
+        self.started_at = started_at  # time.perf_counter() at the top of the main module
+        self.phases = [("imports", 0.0, imported_at - started_at)]
+        self.marks = {}
+        self.boot_offset = since_boot()
+        if self.boot_offset is not None:
+            self.boot_offset -= time.perf_counter() - started_at  # Boot clock when the process started
+        self.lock = threading.Lock()
+
+    def phase(self, name, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            with self.lock:
+                self.phases.append((name, start - self.started_at, time.perf_counter() - self.started_at))
+
+    def parallel(self, steps):
+        """Run {name: func} concurrently, each timed as its own phase; returns {name: result}."""
+        with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="startup") as pool:
+            futures = {name: pool.submit(self.phase, name, func) for name, func in steps.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def mark(self, name):
+        """Record the first time something happens (e.g. the first detection); later calls are ignored."""
+        if name in self.marks:
+            return False
+        with self.lock:
+            if name in self.marks:
+                return False
+            self.marks[name] = time.perf_counter() - self.started_at
+        return True
+
+    def report(self):
+        for name, start, end in sorted(self.phases, key=lambda p: p[1]):
+            print(f"[startup] {name:<20} {start * 1000:7.0f} -> {end * 1000:7.0f} ms ({(end - start) * 1000:.0f} ms)")
+        for name, at in self.marks.items():
+            boot = f", {self.boot_offset + at:.1f} s after boot" if self.boot_offset is not None else ""
+            print(f"[startup] {name} at {at * 1000:.0f} ms{boot}")
+
+    def save(self, path=STARTUP_PROFILE):
+        profile = {
+            "phases": [{"name": name, "start_ms": round(start * 1000, 1), "end_ms": round(end * 1000, 1)}
+                       for name, start, end in sorted(self.phases, key=lambda p: p[1])],
+            "marks_ms": {name: round(at * 1000, 1) for name, at in self.marks.items()},
+            "process_start_since_boot_s": round(self.boot_offset, 2) if self.boot_offset is not None else None,
+        }
+        try:
+            with open(path, 'w') as f:
+                json.dump(profile, f, indent=2)
+        except OSError as e:
+            print(f"Could not write {path}: {e}")
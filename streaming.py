@@ -0,0 +1,254 @@
+import os
+import subprocess
+
+import cv2
+import numpy as np
+
+# "raw" sends BGR frames straight to ffmpeg's stdin, "mjpeg" is the old JPEG-through-a-FIFO path,
+# "passthrough" forwards the camera's own JPEGs and sends the boxes separately (see PassthroughStream),
+# "null" discards frames (no ffmpeg needed)
+STREAM_MODE = "raw"
+STREAM_FPS = 15
+STREAM_BITRATE = "500k"
+# JPEG quality where the detector encodes frames (mjpeg, and passthrough for sources without JPEGs);
+# qos.py lowers it under load
+STREAM_JPEG_QUALITY = 95
+# Passthrough: True sends the camera's MJPEG as is (-c:v copy), False encodes it to H.264 once
+PASSTHROUGH_COPY = False
+
+X264_ARGS = ['-c:v', 'libx264', '-preset', 'ultrafast', '-tune', 'zerolatency']
+
+
+def rtsp_output(url):
+    return ['-f', 'rtsp', url]
+
+
+class FrameHold:
+    """Sends a new picture only every `every` frames and repeats the last one in between.
+
+    The frame rate ffmpeg sees does not change, and x264 codes a repeated picture as an almost empty
+    frame, so this lowers the bandwidth of a running stream (the bitrate can only be changed by
+    restarting ffmpeg, which drops the viewers). copy keeps the held picture in a buffer of its own,
+    for payloads that are pooled frame buffers.
+    """
+
+    def __init__(self, copy=False):
+        self.every = 1
+        self.copy = copy
+        self.count = 0
+        self.held = None
+
+    def __call__(self, payload):
+        """The payload to write for this frame."""
+        if self.every <= 1:
+            self.held = None
+            return payload
+        self.count += 1
+        if self.held is not None and self.count < self.every:
+            return self.held
+        self.count = 0
+        if not self.copy:
+            self.held = payload
+        elif self.held is None or self.held.shape != payload.shape:
+            self.held = np.array(payload)
+        else:
+            np.copyto(self.held, payload)
+        return self.held
+
+
+class MjpegStream:
+    """Old path: JPEG-encode in Python, ffmpeg decodes from a FIFO and re-encodes to H.264."""
+    overlay = True  # Boxes are drawn into the picture before encode()
+
+    def __init__(self, name, width, height, output, fps=STREAM_FPS, bitrate=STREAM_BITRATE):
+        self.fifo = f"/tmp/vidpipe_{name}"
+        self.output = output
+        self.bitrate = bitrate
+        self.quality = STREAM_JPEG_QUALITY
+        self.hold = FrameHold()
+        self.process = None
+        self.pipe = None
+        self.restarts = 0
+
+    def open(self):
+        if not os.path.exists(self.fifo):
+            os.mkfifo(self.fifo)
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-re',
+            '-f', 'mjpeg',
+            '-i', self.fifo,
+        ] + X264_ARGS + ['-b:v', self.bitrate] + self.output
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE)
+        self.pipe = open(self.fifo, 'wb')
+
+    def encode(self, frame):
+        _, jpeg_frame = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg_frame.tobytes()
+
+    def write(self, payload):
+        payload = self.hold(payload)
+        try:
+            self.pipe.write(payload)
+        except BrokenPipeError:
+            print("Stream connection broken - restarting...")
+            self.restarts += 1
+            self.close()
+            self.open()
+
+    def close(self):
+        if self.pipe:
+            try:
+                self.pipe.close()
+            except BrokenPipeError:
+                pass
+            self.pipe = None
+        if self.process:
+            self.process.stdin.close()
+            self.process.terminate()
+            self.process = None
+
+
+class RawStream:
+    """Raw BGR frames into ffmpeg's stdin: no JPEG round trip and no -re pacing."""
+    overlay = True
+
+    def __init__(self, name, width, height, output, fps=STREAM_FPS, bitrate=STREAM_BITRATE):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.output = output
+        self.bitrate = bitrate
+        self.hold = FrameHold(copy=True)  # Payloads are the pipeline's frame buffers
+        self.process = None
+        self.restarts = 0
+        # Reused for frames that are not already a contiguous width x height BGR image. Three of
+        # them, so the one being written is never the one the encode stage is filling.
+        self.buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(3)]
+        self.next_buffer = 0
+
+    def open(self):
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'bgr24',
+            '-s', f'{self.width}x{self.height}',
+            '-r', str(self.fps),
+            '-i', '-',
+        ] + X264_ARGS + ['-pix_fmt', 'yuv420p', '-b:v', self.bitrate] + self.output
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, bufsize=0)
+
+    def encode(self, frame):
+        if frame.shape == (self.height, self.width, 3) and frame.flags['C_CONTIGUOUS']:
+            return frame
+        buffer = self.buffers[self.next_buffer]
+        self.next_buffer = (self.next_buffer + 1) % len(self.buffers)
+        if frame.shape[:2] != (self.height, self.width):
+            cv2.resize(frame, (self.width, self.height), dst=buffer)
+        else:
+            np.copyto(buffer, frame)
+        return buffer
+
+    def write(self, payload):
+        payload = self.hold(payload)
+        try:
+            self.process.stdin.write(memoryview(payload).cast('B'))
+        except (BrokenPipeError, ValueError):
+            print("Stream connection broken - restarting...")
+            self.restarts += 1
+            self.close()
+            self.open()
+
+    def close(self):
+        if self.process:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.process.terminate()
+            self.process = None
+
+
+class PassthroughStream:
+    """The camera's JPEGs into ffmpeg's stdin, copied or encoded to H.264 once, with nothing drawn on them.
+
+    The detector publishes the boxes as a side-channel datagram per frame instead and the display
+    (eth_audio.py) draws them. encode() is only used for sources that do not deliver JPEGs.
+    """
+    overlay = False
+
+    def __init__(self, name, width, height, output, fps=STREAM_FPS, bitrate=STREAM_BITRATE, copy=PASSTHROUGH_COPY):
+        self.fps = fps
+        self.output = output
+        self.bitrate = bitrate
+        self.copy = copy
+        self.quality = STREAM_JPEG_QUALITY
+        self.hold = FrameHold()  # Repeated JPEGs only get cheaper when they are encoded (copy=False)
+        self.process = None
+        self.restarts = 0
+
+    def open(self):
+        codec = ['-c:v', 'copy'] if self.copy else X264_ARGS + ['-pix_fmt', 'yuv420p', '-b:v', self.bitrate]
+        ffmpeg_cmd = [
+            'ffmpeg',
+            '-f', 'mjpeg',
+            '-framerate', str(self.fps),
+            '-i', '-',
+        ] + codec + self.output
+        self.process = subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, bufsize=0)
+
+    def encode(self, frame):
+        _, jpeg_frame = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg_frame
+
+    def write(self, payload):
+        payload = self.hold(payload)
+        try:
+            self.process.stdin.write(memoryview(payload).cast('B'))
+        except (BrokenPipeError, ValueError):
+            print("Stream connection broken - restarting...")
+            self.restarts += 1
+            self.close()
+            self.open()
+
+    def close(self):
+        if self.process:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.process.terminate()
+            self.process = None
+
+
+class NullStream:
+    """No ffmpeg and no RTSP server: frames are dropped after the encode stage. For headless test runs."""
+    overlay = True
+
+    def __init__(self, name, width, height, output, fps=STREAM_FPS, bitrate=STREAM_BITRATE):
+        self.bitrate = bitrate
+        self.hold = FrameHold()
+        self.restarts = 0
+        self.frames = 0
+
+    def open(self):
+        pass
+
+    def encode(self, frame):
+        return frame
+
+    def write(self, payload):
+        self.hold(payload)
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+STREAMS = {"raw": RawStream, "mjpeg": MjpegStream, "passthrough": PassthroughStream, "null": NullStream}
+
+
+def open_stream(mode, name, width, height, output, fps=STREAM_FPS):
+    stream = STREAMS[mode](name, width, height, output, fps=fps)
+    stream.open()
+    return stream
@@ -0,0 +1,41 @@
+import threading
+
+import numpy as np
+import pytest
+
+from batching import BatchInference
+
+
+class _Model:
+    def preprocess(self, images):
+        return images
+
+    def infer(self, inputs):
+        return np.zeros((0, 7), dtype=np.float32)
+
+
+def test_stop_with_skipped_frame_pending():
+    # A long timeout keeps the skip marker pending while a second camera waits on its batch
+    batcher = BatchInference(_Model(), expected=3, timeout=60.0)
+    batcher.skip("left")
+    result = {}
+    waiter = threading.Thread(target=lambda: result.update(rear=batcher.infer("rear", np.zeros((3, 3, 3)))))
+    waiter.start()
+    while "rear" not in batcher.pending:
+        waiter.join(0.01)
+    batcher.stop()
+    waiter.join(timeout=1.0)
+    assert not waiter.is_alive()
+    assert result["rear"].shape == (1, 1, 0, 7)
+
+
+class _FailingModel(_Model):
+    def infer(self, inputs):
+        raise RuntimeError("bad input size")
+
+
+def test_batch_error_raised_in_infer():
+    batcher = BatchInference(_FailingModel(), expected=1)
+    with pytest.raises(RuntimeError, match="bad input size"):
+        batcher.infer("rear", np.zeros((3, 3, 3)))
+    batcher.stop()
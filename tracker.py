@@ -0,0 +1,93 @@
+import numpy as np
+
+# Boxes of the same class overlapping at least this much are treated as the same object
+IOU_THRESHOLD = 0.3
+# Tracks not matched by a detection for this long are dropped (seconds)
+MAX_AGE = 1.0
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU between boxes a (N, 4) and b (M, 4) given as x1, y1, x2, y2."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    __slots__ = ("track_id", "class_id", "confidence", "box", "velocity", "updated_at")
+
+    def __init__(self, track_id, class_id, confidence, box, t):
+        self.track_id = track_id
+        self.class_id = class_id
+        self.confidence = confidence
+        self.box = box.astype(np.float32)
+        self.velocity = np.zeros(4, dtype=np.float32)  # pixels per second for each box edge
+        self.updated_at = t
+
+    def predict(self, t):
+        return self.box + self.velocity * (t - self.updated_at)
+
+
+class BoxTracker:
+    """IoU association with constant-velocity prediction, used to carry boxes between inference frames."""
+
+    def __init__(self, iou_threshold=IOU_THRESHOLD, max_age=MAX_AGE):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age
+        self.tracks = []
+        self.next_id = 1
+
+    def update(self, class_ids, confidences, boxes, t):
+        """Match the detections of an inference frame to the tracks; returns the track id of each row."""
+        track_ids = np.zeros(len(class_ids), dtype=np.int64)
+        unmatched = list(range(len(class_ids)))
+        if self.tracks and len(class_ids):
+            predicted = np.array([track.predict(t) for track in self.tracks])
+            ious = iou_matrix(predicted, boxes.astype(np.float32))
+            # Only boxes of the same class can continue a track
+            ious[np.array([track.class_id for track in self.tracks])[:, None] != class_ids[None, :]] = 0
+            # Greedy assignment, best overlap first
+            used_tracks = set()
+            for flat in np.argsort(ious, axis=None)[::-1]:
+                i, j = np.unravel_index(flat, ious.shape)
+                if ious[i, j] < self.iou_threshold:
+                    break
+                if i in used_tracks or j not in unmatched:
+                    continue
+                track = self.tracks[i]
+                dt = t - track.updated_at
+                if dt > 0:
+                    track.velocity = (boxes[j] - track.box) / dt
+                track.box = boxes[j].astype(np.float32)
+                track.confidence = confidences[j]
+                track.updated_at = t
+                track_ids[j] = track.track_id
+                used_tracks.add(i)
+                unmatched.remove(j)
+
+        for j in unmatched:
+            track = Track(self.next_id, class_ids[j], confidences[j], boxes[j], t)
+            self.next_id += 1
+            self.tracks.append(track)
+            track_ids[j] = track.track_id
+
+        self.tracks = [track for track in self.tracks if t - track.updated_at <= self.max_age]
+        return track_ids
+
+    def predict(self, t):
+        """Boxes of all live tracks moved forward to time t, as (class_ids, confidences, boxes, track_ids)."""
+        tracks = [track for track in self.tracks if t - track.updated_at <= self.max_age]
+        if not tracks:
+            return (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32),
+                    np.zeros((0, 4), dtype=int), np.zeros(0, dtype=np.int64))
+        class_ids = np.array([track.class_id for track in tracks], dtype=np.intp)
+        confidences = np.array([track.confidence for track in tracks], dtype=np.float32)
+        boxes = np.array([track.predict(t) for track in tracks]).astype(int)
+        track_ids = np.array([track.track_id for track in tracks], dtype=np.int64)
+        return class_ids, confidences, boxes, track_ids